@@ -0,0 +1,80 @@
+"""
+Bytes-per-turn and write latency: MongoDBSaver vs CompactMongoDBSaver.
+
+Runs a fake chat (no LLM, fixed-size replies) for N turns on one thread
+with each saver and reports storage and per-turn invoke latency.
+
+    python -m langgraph_learn.bench_checkpointer --mongomock     # in-memory stand-in (mongomock_compat.py)
+    python -m langgraph_learn.bench_checkpointer --url mongodb://localhost:27017
+"""
+import argparse
+import statistics
+import time
+
+import bson
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from langgraph.graph import END, START, StateGraph
+from pymongo import MongoClient
+
+from .checkpointing import CompactMongoDBSaver
+from .history import SummaryState
+
+REPLY = "Sure! Here is a fairly typical chat answer with a bit of detail. " * 8
+
+
+def echo(state):
+    return {"messages": [AIMessage(content=REPLY)]}
+
+
+def collection_bytes(collection) -> int:
+    return sum(len(bson.encode(doc)) for doc in collection.find())
+
+
+def run(name: str, saver, turns: int):
+    workflow = StateGraph(SummaryState)
+    workflow.add_node("chat", echo)
+    workflow.add_edge(START, "chat")
+    workflow.add_edge("chat", END)
+    graph = workflow.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": f"bench-{name}"}}
+
+    latencies = []
+    for turn in range(turns):
+        t0 = time.perf_counter()
+        graph.invoke({"messages": [HumanMessage(content=f"question number {turn}")]}, config=config)
+        latencies.append(time.perf_counter() - t0)
+
+    stored = collection_bytes(saver.checkpoint_collection) + collection_bytes(saver.writes_collection)
+    docs = saver.checkpoint_collection.count_documents({})
+    print(
+        f"{name:8} {docs:5} checkpoints, {stored / 1024:9.1f} KiB total, "
+        f"{stored / turns / 1024:7.2f} KiB/turn, "
+        f"invoke p50 {statistics.median(latencies) * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark checkpoint storage")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--url", default="mongodb://localhost:27017")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock instead of a real server")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        from .mongomock_compat import MongoClient as MockClient
+        client = MockClient()
+    else:
+        client = MongoClient(args.url)
+
+    db = "checkpoint_bench"
+    client.drop_database(db)
+    run("plain", MongoDBSaver(client, db_name=db, checkpoint_collection_name="plain",
+                              writes_collection_name="plain_writes"), args.turns)
+    run("compact", CompactMongoDBSaver(client, db_name=db, checkpoint_collection_name="compact",
+                                       writes_collection_name="compact_writes"), args.turns)
+    client.drop_database(db)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,12 @@
+# Run from the repo root:  python -m langgraph_learn.chat
 from typing_extensions import TypedDict
 from typing import Annotated
 from langgraph.graph.message import add_messages
 from langgraph.graph import StateGraph, START, END
-from langchain_ollama import ChatOllama
+from llm_gateway import chat_model
 
-llm = ChatOllama(
+llm = chat_model(
     model="gemma2:2b",           # make sure you ran: ollama pull gemma2:2b
-    base_url="http://localhost:11434",
     temperature=0.7,
     # num_ctx=8192,             # optional - increase if needed
 )
@@ -33,7 +33,8 @@ graph_builder.add_edge("chatbot","sampleNode")
 graph_builder.add_edge("sampleNode",END)
 
 
-graph= graph_builder.compile()
+if __name__ == "__main__":
+    graph= graph_builder.compile()
 
-updated_state= graph.invoke(State({"messages":["Hi this is santhosh"]}))
-print("\n\nUpdated State", updated_state)
+    updated_state= graph.invoke(State({"messages":["Hi this is santhosh"]}))
+    print("\n\nUpdated State", updated_state)
@@ -1,16 +1,15 @@
+# Run from the repo root:  python -m langgraph_learn.chat_2
 from typing import Annotated, Literal
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langchain_ollama import ChatOllama
+from llm_gateway import chat_model
 from langchain_core.messages import HumanMessage, AIMessage
 
+from .router import KeywordRouter
+
 # LLM setup (you can keep using your gemma2:2b)
-llm = ChatOllama(
-    model="gemma2:2b",
-    base_url="http://localhost:11434",
-    temperature=0.7,
-)
+llm = chat_model(model="gemma2:2b", temperature=0.7)
 
 # State
 class State(TypedDict):
@@ -53,24 +52,41 @@ def neutral_path(state: State) -> dict:
 
 # ─── Conditional Router ───────────────────────────────────────────────────
 
+def classify_mood_with_llm(mood_text: str) -> str:
+    """Last resort for inputs neither keywords nor the nearest example phrase are sure about."""
+    print("(asking the LLM about this one)")
+    answer = llm.invoke(
+        "Classify the mood of this message as exactly one word: happy, sad or neutral.\n"
+        f"Message: {mood_text}"
+    ).content.strip().lower()
+    return next((mood for mood in ("happy", "sad", "neutral") if mood in answer), "neutral")
+
+
+# Exact example phrases, one precompiled matcher for all keywords, nearest
+# example by trigram similarity for everything else, and the LLM only when
+# none of them is sure (see router.py)
+mood_router = KeywordRouter(
+    routes={
+        "happy": ["good", "great", "happy", "awesome", "nice", "excellent", "amazing", "yay"],
+        "sad": ["bad", "sad", "tired", "awful", "terrible", "depressed", "down", "not good"],
+    },
+    default="neutral",
+    examples={
+        "happy": ["feeling fantastic", "wonderful day", "super excited", "i feel joyful", "pretty cool"],
+        "sad": ["feeling low", "i am exhausted", "upset and lonely", "miserable", "stressed out"],
+        "neutral": ["okay", "ok", "fine", "i'm fine", "fine i guess", "meh", "just normal", "so so"],
+    },
+    escalate=classify_mood_with_llm,
+)
+
+
 def decide_mood_route(state: State) -> Literal["happy", "sad", "neutral"]:
     """
-    Simple keyword-based mood classifier
-    You can make this smarter later using LLM if you want
+    Keyword regex → nearest example phrase → LLM, cached per normalized input.
+    "not good" now routes to sad (it used to hit "good" first).
     """
-    mood_text = state["mood"].lower()
     print("Evaluating User Mood")
-    happy_keywords = ["good", "great", "happy", "awesome", "nice", "excellent", "amazing", "yay"]
-    sad_keywords = ["bad", "sad", "tired", "awful", "terrible", "depressed", "down", "not good"]
-
-    if any(word in mood_text for word in happy_keywords):
-        return "happy"
-    
-    elif any(word in mood_text for word in sad_keywords):
-        return "sad"
-    
-    else:
-        return "neutral"
+    return mood_router(state["mood"])
 
 
 # ─── Build Graph ──────────────────────────────────────────────────────────
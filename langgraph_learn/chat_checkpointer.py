@@ -1,69 +1,82 @@
+# Run from the repo root:  python -m langgraph_learn.chat_checkpointer
 from langgraph.graph import StateGraph, START, END
-from langgraph.graph.message import add_messages
-from langgraph.checkpoint.mongodb import MongoDBSaver
 
-from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from llm_gateway import chat_model
 
-# LLM setup
-llm = ChatOllama(
-    model="gemma2:2b",
-    base_url="http://localhost:11434",
-    temperature=0.7,
-)
+from .checkpointing import CompactMongoDBSaver
+from .history import SummaryState, make_compact_node, with_summary
 
-# Very simple state (only conversation messages)
-class State(dict):
-    messages: list = add_messages
+# LLM setup (pooled connections, timeouts, metrics: see llm_gateway.py)
+llm = chat_model(model="gemma2:2b", temperature=0.7)
 
-# Single node: just call LLM with full message history
+# State: recent messages + rolling summary of everything older
+State = SummaryState
+
+# Chat node: LLM sees the summary + recent window, not the whole history
 def chat(state):
-    response = llm.invoke(state["messages"])
+    response = llm.invoke(with_summary(state))
+    return {"messages": [response]}
+
+# Same node for ainvoke/astream (used by server.py), no thread hop per call
+async def achat(state):
+    response = await llm.ainvoke(with_summary(state))
     return {"messages": [response]}
 
-# Build minimal graph
+# Build minimal graph: chat, then fold old turns into the summary if the
+# window got too big (so the next turn starts from a compact state)
 workflow = StateGraph(State)
-workflow.add_node("chat", chat)
+workflow.add_node("chat", RunnableLambda(chat, afunc=achat, name="chat"))
+workflow.add_node("compact", make_compact_node(llm))
 workflow.add_edge(START, "chat")
-workflow.add_edge("chat", END)
+workflow.add_edge("chat", "compact")
+workflow.add_edge("compact", END)
+
+
+def main():
+    print("=== Simple persistent chat (MongoDB) ===")
+    print("   Type your message or 'quit' to exit\n")
+
+    # Compressed checkpoints, last 20 per thread kept (see checkpointing.py)
+    with CompactMongoDBSaver.from_conn_string(
+        "mongodb://localhost:27017",
+        db_name="langchain",
+        checkpoint_collection_name="checkpointers",
+        writes_collection_name="checkpointers_writes",
+    ) as checkpointer:
 
-print("=== Simple persistent chat (MongoDB) ===")
-print("   Type your message or 'quit' to exit\n")
+        # Compile graph with checkpointer inside the context
+        graph = workflow.compile(checkpointer=checkpointer)
 
-# Using context manager style for MongoDBSaver
-with MongoDBSaver.from_conn_string(
-    connection_string="mongodb://localhost:27017",
-    db_name="langchain",
-    collection_name="checkpointers"
-) as checkpointer:
+        # Fixed thread/conversation ID (memory key)
+        config = {"configurable": {"thread_id": "chat-2025-001"}}
 
-    # Compile graph with checkpointer inside the context
-    graph = workflow.compile(checkpointer=checkpointer)
+        while True:
+            user_input = input("You: ").strip()
 
-    # Fixed thread/conversation ID (memory key)
-    config = {"configurable": {"thread_id": "chat-2025-001"}}
+            if user_input.lower() in ['quit', 'exit', 'q']:
+                print("\nGoodbye! 👋")
+                break
 
-    while True:
-        user_input = input("You: ").strip()
+            if not user_input:
+                continue
 
-        if user_input.lower() in ['quit', 'exit', 'q']:
-            print("\nGoodbye! 👋")
-            break
+            # Run the graph with only the new user message
+            # → previous messages + summary are automatically loaded by checkpointer
+            result = graph.invoke(
+                {"messages": [HumanMessage(content=user_input)]},
+                config=config
+            )
 
-        if not user_input:
-            continue
+            # Show the latest AI response (compact never removes the newest turn)
+            ai_response = result["messages"][-1].content
+            print("AI :", ai_response)
+            print("-" * 60)
 
-        # Run the graph with only the new user message
-        # → previous messages are automatically loaded by checkpointer
-        result = graph.invoke(
-            {"messages": [HumanMessage(content=user_input)]},
-            config=config
-        )
+    print("\nConversation memory is stored in MongoDB.")
+    print("Run the script again → it should remember previous messages!")
 
-        # Show the latest AI response
-        ai_response = result["messages"][-1].content
-        print("AI :", ai_response)
-        print("-" * 60)
 
-print("\nConversation memory is stored in MongoDB.")
-print("Run the script again → it should remember previous messages!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
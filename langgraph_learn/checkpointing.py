@@ -0,0 +1,114 @@
+"""
+MongoDB checkpointer tuned for long-running chat threads.
+
+CompactMongoDBSaver is a drop-in MongoDBSaver that
+  - zlib-compresses serialized checkpoints and pending writes,
+  - keeps only the last `keep_last` checkpoints per thread (older ones and
+    their pending writes are deleted with one delete_many each, every
+    `prune_every` puts rather than on every turn).
+
+Indexes (unique thread_id/checkpoint_ns/checkpoint_id on both collections)
+are MongoDBSaver's own. Pending writes already go out as one bulk_write
+per task there.
+
+It takes any pymongo-compatible client, e.g. the in-memory stand-in in
+mongomock_compat.py (see bench_checkpointer.py). graph.ainvoke/astream use
+MongoDBSaver's async methods, which run these same sync methods (put with
+pruning included) in an executor over the client's pool.
+"""
+import zlib
+from contextlib import contextmanager
+
+from langgraph.checkpoint.mongodb import MongoDBSaver
+from pymongo import DESCENDING, MongoClient
+
+KEEP_LAST = 20
+PRUNE_EVERY = 10
+COMPRESS_MIN_BYTES = 256     # tiny payloads aren't worth compressing
+ZLIB_PREFIX = "zlib+"
+
+
+class CompressedSerializer:
+    """Wraps a LangGraph serializer, compressing whatever it produces."""
+
+    def __init__(self, inner, level: int = 6):
+        self.inner = inner
+        self.level = level
+
+    def dumps_typed(self, obj):
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < COMPRESS_MIN_BYTES:
+            return type_, data
+        return ZLIB_PREFIX + type_, zlib.compress(data, self.level)
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_.startswith(ZLIB_PREFIX):
+            return self.inner.loads_typed((type_[len(ZLIB_PREFIX):], zlib.decompress(payload)))
+        return self.inner.loads_typed((type_, payload))
+
+    def __getattr__(self, name):
+        # dumps/loads etc. used for metadata stay uncompressed (Mongo queries them)
+        return getattr(self.inner, name)
+
+
+class CompactMongoDBSaver(MongoDBSaver):
+    def __init__(
+        self,
+        client: MongoClient,
+        db_name: str = "checkpointing_db",
+        checkpoint_collection_name: str = "checkpoints",
+        writes_collection_name: str = "checkpoint_writes",
+        keep_last: int = KEEP_LAST,
+        prune_every: int = PRUNE_EVERY,
+        compress: bool = True,
+        **kwargs,
+    ):
+        super().__init__(
+            client,
+            db_name=db_name,
+            checkpoint_collection_name=checkpoint_collection_name,
+            writes_collection_name=writes_collection_name,
+            **kwargs,
+        )
+        self.keep_last = keep_last
+        self.prune_every = prune_every
+        self._puts_since_prune: dict[tuple[str, str], int] = {}
+        if compress:
+            self.serde = CompressedSerializer(self.serde)
+
+    @classmethod
+    @contextmanager
+    def from_conn_string(cls, conn_string: str | None = None, db_name: str = "checkpointing_db",
+                         max_pool_size: int = 50, **kwargs):
+        client = MongoClient(conn_string, maxPoolSize=max_pool_size)
+        try:
+            yield cls(client, db_name=db_name, **kwargs)
+        finally:
+            client.close()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        configurable = config["configurable"]
+        key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+        self._puts_since_prune[key] = self._puts_since_prune.get(key, 0) + 1
+        if self._puts_since_prune[key] >= self.prune_every:
+            self._puts_since_prune[key] = 0
+            self.prune(*key)
+        return next_config
+
+    def prune(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Delete all but the newest `keep_last` checkpoints of a thread. Returns deleted count."""
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        old = [
+            doc["checkpoint_id"]
+            for doc in self.checkpoint_collection.find(query, {"checkpoint_id": 1})
+            .sort("checkpoint_id", DESCENDING)
+            .skip(self.keep_last)
+        ]
+        if not old:
+            return 0
+        selector = {**query, "checkpoint_id": {"$in": old}}
+        self.writes_collection.delete_many(selector)
+        return self.checkpoint_collection.delete_many(selector).deleted_count
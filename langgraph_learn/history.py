@@ -0,0 +1,86 @@
+"""
+Bounded conversation history for checkpointed LangGraph chats.
+
+The state keeps a rolling `summary` plus only the most recent messages.
+Once the message history grows past `max_tokens`, the `compact` node folds
+the oldest messages into the summary (one small LLM call) and removes them
+from the state with RemoveMessage. The checkpoint therefore stays bounded,
+and so does the prompt sent on every turn.
+"""
+from typing import Annotated
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph.message import add_messages
+from typing_extensions import TypedDict
+
+MAX_HISTORY_TOKENS = 2000      # compact once the window grows past this
+KEEP_TOKENS = 1000             # ...down to roughly this many recent tokens
+CHARS_PER_TOKEN = 4
+
+
+class SummaryState(TypedDict):
+    messages: Annotated[list, add_messages]
+    summary: str
+
+
+def estimate_tokens(messages: list[BaseMessage]) -> int:
+    return sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN
+
+
+def with_summary(state: SummaryState) -> list[BaseMessage]:
+    """What the LLM actually sees: summary of older turns + recent window."""
+    summary = state.get("summary")
+    if not summary:
+        return state["messages"]
+    return [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] + state["messages"]
+
+
+def _messages_to_fold(messages: list[BaseMessage], max_tokens: int, keep_tokens: int) -> list[BaseMessage]:
+    if estimate_tokens(messages) <= max_tokens:
+        return []
+
+    # Walk back from the newest message until the keep budget is used,
+    # then cut at a user turn so the window never starts mid-exchange
+    cut, kept = len(messages), 0
+    while cut > 0 and kept + estimate_tokens([messages[cut - 1]]) <= keep_tokens:
+        cut -= 1
+        kept += estimate_tokens([messages[cut]])
+    while cut < len(messages) and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+    # Never fold away the latest exchange, however long it is
+    human_turns = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+    if human_turns:
+        cut = min(cut, human_turns[-1])
+    return messages[:cut]
+
+
+def _summary_prompt(state: SummaryState, old: list[BaseMessage]) -> list[BaseMessage]:
+    transcript = "\n".join(f"{m.type}: {m.content}" for m in old)
+    previous = state.get("summary") or "(none yet)"
+    return [
+        SystemMessage(content="You maintain a short running summary of a conversation. "
+                              "Keep names, facts, preferences and open questions. Max 150 words."),
+        HumanMessage(content=f"Current summary:\n{previous}\n\nNew messages to fold in:\n{transcript}\n\n"
+                             "Return the updated summary only."),
+    ]
+
+
+def make_compact_node(llm, max_tokens: int = MAX_HISTORY_TOKENS, keep_tokens: int = KEEP_TOKENS):
+    """Compaction node with sync + async paths (graph.invoke and graph.ainvoke/astream)."""
+
+    def compact(state: SummaryState) -> dict:
+        old = _messages_to_fold(state["messages"], max_tokens, keep_tokens)
+        if not old:
+            return {}
+        response = llm.invoke(_summary_prompt(state, old))
+        return {"summary": response.content, "messages": [RemoveMessage(id=m.id) for m in old]}
+
+    async def acompact(state: SummaryState) -> dict:
+        old = _messages_to_fold(state["messages"], max_tokens, keep_tokens)
+        if not old:
+            return {}
+        response = await llm.ainvoke(_summary_prompt(state, old))
+        return {"summary": response.content, "messages": [RemoveMessage(id=m.id) for m in old]}
+
+    return RunnableLambda(compact, afunc=acompact, name="compact")
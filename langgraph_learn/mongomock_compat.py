@@ -0,0 +1,83 @@
+"""
+In-memory MongoDB stand-in for the checkpointers (bench_checkpointer.py).
+
+mongomock alone can't run MongoDBSaver (langgraph-checkpoint-mongodb 0.3.0
+on pymongo 4.x) because that saver
+  - calls list_indexes().to_list(), but mongomock returns a generator
+  - calls create_index(keys=[...]), but mongomock names it key_or_list
+  - calls bulk_write with pymongo 4.x UpdateOne objects, which mongomock
+    can't unpack (they have a newer `sort` field)
+
+This client wraps mongomock and patches only those three calls. Everything
+else goes straight to mongomock.
+
+    client = MongoClient()
+    saver = CompactMongoDBSaver(client, db_name="test")
+"""
+import mongomock
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+
+
+class _Cursor(list):
+    def to_list(self, length=None):
+        return list(self) if length is None else list(self)[:length]
+
+
+class Collection:
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def list_indexes(self, *args, **kwargs):
+        return _Cursor(self._inner.list_indexes(*args, **kwargs))
+
+    def create_index(self, keys, **kwargs):
+        return self._inner.create_index(keys, **kwargs)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        # Apply the operations one by one, same outcome for a single client
+        for op in requests:
+            if isinstance(op, InsertOne):
+                self._inner.insert_one(op._doc)
+            elif isinstance(op, UpdateOne):
+                self._inner.update_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, UpdateMany):
+                self._inner.update_many(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, ReplaceOne):
+                self._inner.replace_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, DeleteOne):
+                self._inner.delete_one(op._filter)
+            elif isinstance(op, DeleteMany):
+                self._inner.delete_many(op._filter)
+            else:
+                raise TypeError(f"unsupported bulk operation {op!r}")
+
+
+class Database:
+    def __init__(self, inner):
+        self._inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def __getitem__(self, name):
+        return Collection(self._inner[name])
+
+    def get_collection(self, name, **kwargs):
+        return Collection(self._inner.get_collection(name, **kwargs))
+
+
+class MongoClient:
+    def __init__(self, *args, **kwargs):
+        self._inner = mongomock.MongoClient(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+    def __getitem__(self, name):
+        return Database(self._inner[name])
+
+    def get_database(self, name, **kwargs):
+        return Database(self._inner.get_database(name, **kwargs))
@@ -0,0 +1,92 @@
+"""
+Fast text router for conditional edges.
+
+0. Empty text → default route; an exact example phrase → its route.
+1. All keywords of all routes are compiled into ONE regex (longest first,
+   so "not good" wins over "good") → a single pass over the text.
+2. No keyword hit → nearest example: hashed character-trigram vectors of
+   every example phrase, cosine vs. the input, best match wins. Pure
+   NumPy, no model call. (Nearest example rather than per-route centroid:
+   averaging short, unrelated phrases left even the examples themselves
+   below the threshold.)
+3. Still not confident → optional `escalate(text)` (e.g. an LLM), else the
+   default route.
+
+Results are cached per normalized input. Use `router.edge("mood")` to get
+a function that can be passed straight to add_conditional_edges.
+"""
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+DIM = 512
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trigram_vector(text: str) -> np.ndarray:
+    padded = f"  {text} "
+    vec = np.zeros(DIM, dtype=np.float32)
+    for i in range(len(padded) - 2):
+        vec[zlib.crc32(padded[i:i + 3].encode()) % DIM] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class KeywordRouter:
+    def __init__(
+        self,
+        routes: dict[str, list[str]],
+        default: str,
+        examples: dict[str, list[str]] | None = None,
+        min_confidence: float = 0.45,
+        escalate=None,
+        cache_size: int = 4096,
+    ):
+        self.default = default
+        self.min_confidence = min_confidence
+        self.escalate = escalate
+        # Earlier routes win ties, same as the old if/elif order
+        self._order = {route: i for i, route in enumerate(routes)}
+
+        self._route_of = {normalize(kw): route for route, kws in routes.items() for kw in kws}
+        alternation = "|".join(re.escape(kw) for kw in sorted(self._route_of, key=len, reverse=True))
+        self._regex = re.compile(rf"\b(?:{alternation})\b")
+
+        self._exact = {normalize(e): route for route, phrases in (examples or {}).items() for e in phrases}
+        self._labels = list(self._exact.values())
+        self._vectors = np.stack([_trigram_vector(e) for e in self._exact]) if self._exact else None
+
+        self._cached = lru_cache(maxsize=cache_size)(self._classify)
+
+    def __call__(self, text: str) -> str:
+        return self._cached(normalize(text))
+
+    def edge(self, key: str):
+        """Conditional-edge function that routes on state[key]."""
+        return lambda state: self(state[key])
+
+    def _classify(self, text: str) -> str:
+        if not text:
+            return self.default
+        if text in self._exact:
+            return self._exact[text]
+
+        votes = Counter(self._route_of[m] for m in self._regex.findall(text))
+        if votes:
+            return max(votes, key=lambda route: (votes[route], -self._order[route]))
+
+        if self._vectors is not None:
+            scores = self._vectors @ _trigram_vector(text)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.min_confidence:
+                return self._labels[best]
+
+        if self.escalate is not None:
+            return self.escalate(text)
+        return self.default
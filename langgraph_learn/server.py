@@ -0,0 +1,143 @@
+"""
+Async multi-conversation server for the LangGraph chats.
+
+    python -m langgraph_learn.server
+    curl -N -X POST localhost:8001/graphs/chat/threads/alice-1/messages \
+         -H 'content-type: application/json' -d '{"content": "hi!", "stream": true}'
+
+Graphs run with ainvoke/astream, so one process serves many threads at
+once. Turns of the *same* thread are serialized with a per-thread lock, so
+two requests can never race on that thread's checkpoint. All graphs share
+one pooled MongoDB checkpointer. Streaming responses are Server-Sent
+Events: `node` when a node finishes, `token` for chat tokens, then `done`.
+
+Only the checkpointed chat (chat_checkpointer.py) is served: its history
+is bounded by the compact node. chat.py's graph always answers with its
+sample node's fixed text and keeps every message, and chat_2.py's ask_mood
+node reads from input().
+"""
+import asyncio
+import json
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import HumanMessage
+from llm_gateway import metrics as llm_metrics
+from pydantic import BaseModel
+
+from . import chat_checkpointer
+from .checkpointing import CompactMongoDBSaver
+
+MONGO_URL = "mongodb://localhost:27017"
+MAX_CONCURRENT_RUNS = 256      # graph runs in flight across all threads
+
+graphs = {}
+run_slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+
+
+class ThreadLocks:
+    """One asyncio.Lock per thread id, dropped again once nobody holds/waits on it."""
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._users: defaultdict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str):
+        lock = self._locks.setdefault(thread_id, asyncio.Lock())
+        self._users[thread_id] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[thread_id] -= 1
+            if not self._users[thread_id]:
+                del self._users[thread_id]
+                del self._locks[thread_id]
+
+
+thread_locks = ThreadLocks()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with CompactMongoDBSaver.from_conn_string(
+        MONGO_URL,
+        db_name="langchain",
+        checkpoint_collection_name="checkpointers",
+        writes_collection_name="checkpointers_writes",
+    ) as checkpointer:
+        graphs["chat"] = chat_checkpointer.workflow.compile(checkpointer=checkpointer)
+        yield
+        graphs.clear()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+class Message(BaseModel):
+    content: str
+    stream: bool = False
+
+
+def _graph(name: str):
+    graph = graphs.get(name)
+    if graph is None:
+        raise HTTPException(status_code=404, detail=f"Unknown graph {name!r}, have {sorted(graphs)}")
+    return graph
+
+
+@app.get('/')
+async def root():
+    return {"status": "server is up and running", "graphs": sorted(graphs)}
+
+
+@app.get('/metrics')
+async def metrics():
+    # LLM calls of every graph (latency, TTFT, tokens, errors), see llm_gateway.py
+    return llm_metrics.snapshot()
+
+
+@app.post('/graphs/{graph_name}/threads/{thread_id}/messages')
+async def send_message(graph_name: str, thread_id: str, message: Message):
+    graph = _graph(graph_name)
+    config = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content=message.content)]}
+
+    if not message.stream:
+        async with run_slots, thread_locks.hold(thread_id):
+            result = await graph.ainvoke(inputs, config=config)
+        return {"thread_id": thread_id, "reply": result["messages"][-1].content}
+
+    async def events():
+        async with run_slots, thread_locks.hold(thread_id):
+            async for mode, payload in graph.astream(inputs, config=config, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    chunk, meta = payload
+                    # only the answering node's tokens, not e.g. the summary call
+                    if meta.get("langgraph_node") == "chat" and chunk.content:
+                        yield f"event: token\ndata: {json.dumps(chunk.content)}\n\n"
+                else:
+                    for node in payload:
+                        yield f"event: node\ndata: {json.dumps(node)}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get('/graphs/{graph_name}/threads/{thread_id}')
+async def get_thread(graph_name: str, thread_id: str):
+    graph = _graph(graph_name)
+    state = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+    return {
+        "thread_id": thread_id,
+        "summary": state.values.get("summary"),
+        "messages": [{"role": m.type, "content": m.content} for m in state.values.get("messages", [])],
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, port=8001, host="0.0.0.0")
@@ -0,0 +1,396 @@
+"""
+One place to configure how this repo talks to LLMs.
+
+Every script used to build its own OpenAI(base_url=...) / ChatOllama with a
+hardcoded model and no timeouts. They now share:
+
+  - LLMGateway: OpenAI-compatible client (Ollama by default) on a pooled
+    httpx transport with keep-alive, connect/read timeouts, and retries with
+    exponential backoff + jitter for connection errors, timeouts, 429s and
+    5xx. Sync (chat, stream) and async (achat, astream) APIs.
+  - chat_model(): ChatOllama factory with the same timeouts, pooled
+    connections with connect retries, and the same metrics (callback).
+  - metrics: per-call latency, time to first token (streams), prompt /
+    completion tokens (estimated for streams closed early), retries and errors. Each call is logged on the
+    "llm_gateway" logger; metrics.snapshot() gives the aggregate.
+
+HTTP/2 is enabled when the `h2` package is installed. It only applies to
+https endpoints (e.g. api.openai.com); plain-http Ollama stays on HTTP/1.1
+keep-alive connections.
+
+Settings come from the environment: LLM_BASE_URL, LLM_API_KEY, LLM_MODEL,
+LLM_TIMEOUT, LLM_MAX_RETRIES, OLLAMA_HOST.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:
+    HTTP2 = False
+
+# === CONFIG ===
+BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")
+API_KEY = os.getenv("LLM_API_KEY", "ollama")         # ignored by Ollama
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gemma2:2b")
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "300"))  # a cold model load can take a while
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF = 0.5              # seconds, doubled per retry (plus jitter)
+POOL_SIZE = 16             # keep-alive connections per client
+CHARS_PER_TOKEN = 4        # token estimate when the server sent no usage
+
+RETRYABLE = (
+    openai.APIConnectionError,    # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+log = logging.getLogger("llm_gateway")
+
+
+def _timeout(read: float) -> httpx.Timeout:
+    return httpx.Timeout(read, connect=CONNECT_TIMEOUT)
+
+
+def _limits(pool_size: int) -> httpx.Limits:
+    return httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+
+
+def _backoff(attempt: int) -> float:
+    return BACKOFF * 2 ** attempt * (0.5 + random.random())
+
+
+class CallMetrics:
+    """Thread-safe counters plus recent latency/TTFT samples for percentiles."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.calls = self.errors = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+        self._latency = deque(maxlen=window)
+        self._ttft = deque(maxlen=window)
+
+    def record(self, model: str, latency: float, ttft: float | None = None, usage=None, error: Exception | None = None):
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        with self._lock:
+            self.calls += 1
+            self.errors += error is not None
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+            self._latency.append(latency)
+            if ttft is not None:
+                self._ttft.append(ttft)
+        if error is not None:
+            log.warning("%s failed after %.0f ms: %s", model, latency * 1000, error)
+        else:
+            first = f", ttft {ttft * 1000:.0f} ms" if ttft is not None else ""
+            log.info("%s %.0f ms%s, %d prompt + %d completion tokens",
+                     model, latency * 1000, first, prompt, completion)
+
+    def retried(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latency, ttft = sorted(self._latency), sorted(self._ttft)
+            stats = {
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+        pct = lambda xs, p: round(xs[min(len(xs) - 1, int(p * len(xs)))] * 1000, 1) if xs else None
+        stats.update(latency_p50_ms=pct(latency, 0.5), latency_p95_ms=pct(latency, 0.95),
+                     ttft_p50_ms=pct(ttft, 0.5), ttft_p95_ms=pct(ttft, 0.95))
+        return stats
+
+
+# Shared by every gateway and chat_model() in the process
+metrics = CallMetrics()
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+
+def _prompt_chars(messages: list) -> int:
+    return sum(len(str(m.get("content") or "")) for m in messages if isinstance(m, dict))
+
+
+class ChatStream:
+    """Iterator over the text deltas of a streamed completion.
+
+    After it is exhausted or closed: `ttft` and `elapsed` (seconds) and
+    `usage`. The server only sends usage in the last chunk, so a stream
+    closed early gets a chars/4 estimate instead (`usage_estimated`).
+    """
+
+    def __init__(self, chunks, model: str, started: float, recorder: CallMetrics, prompt_chars: int = 0):
+        self._chunks = chunks
+        self.model = model
+        self.started = started
+        self.ttft: float | None = None
+        self.elapsed: float | None = None
+        self.usage = None
+        self.usage_estimated = False
+        self._metrics = recorder
+        self._prompt_chars = prompt_chars
+        self._completion_chars = 0
+        self._finished = False
+
+    def _on_chunk(self, chunk) -> str | None:
+        if chunk.usage:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return None
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - self.started
+            self._completion_chars += len(delta)
+        return delta
+
+    def _finish(self, error: Exception | None = None):
+        if self._finished:
+            return
+        self._finished = True
+        self.elapsed = time.perf_counter() - self.started
+        if self.usage is None and error is None:
+            self.usage = _Usage(self._prompt_chars // CHARS_PER_TOKEN, self._completion_chars // CHARS_PER_TOKEN)
+            self.usage_estimated = True
+        self._metrics.record(self.model, self.elapsed, self.ttft, self.usage, error)
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                delta = self._on_chunk(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            self._finish(e)
+            raise
+        finally:
+            self._finish()
+            self._chunks.close()
+
+    def close(self):
+        # stop generation early (closes the HTTP response)
+        self._finish()
+        self._chunks.close()
+
+
+class AsyncChatStream(ChatStream):
+    async def __aiter__(self):
+        try:
+            async for chunk in self._chunks:
+                delta = self._on_chunk(chunk)
+                if delta:
+                    yield delta
+        except Exception as e:
+            self._finish(e)
+            raise
+        finally:
+            self._finish()
+            await self._chunks.close()
+
+    async def close(self):
+        self._finish()
+        await self._chunks.close()
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        base_url: str = BASE_URL,
+        api_key: str = API_KEY,
+        model: str = DEFAULT_MODEL,
+        timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.metrics = metrics
+        # Retries are done here (with metrics), not by the SDK
+        self.client = OpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.Client(http2=HTTP2, limits=_limits(pool_size), timeout=_timeout(timeout)),
+        )
+        self._aclient: AsyncOpenAI | None = None
+
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        # Built on first use, so sync-only scripts never create an async pool
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI(
+                base_url=self.base_url,
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=httpx.AsyncClient(http2=HTTP2, limits=_limits(self.pool_size),
+                                              timeout=_timeout(self.timeout)),
+            )
+        return self._aclient
+
+    # ── sync ──────────────────────────────────────────────────────────
+
+    def chat(self, messages: list, model: str | None = None, **kwargs):
+        """chat.completions.create with retries + metrics; returns the completion."""
+        model = model or self.model
+        started = time.perf_counter()
+        try:
+            response = self._with_retries(lambda: self.client.chat.completions.create(
+                model=model, messages=messages, **kwargs))
+        except Exception as e:
+            self.metrics.record(model, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record(model, time.perf_counter() - started, usage=response.usage)
+        return response
+
+    def stream(self, messages: list, model: str | None = None, **kwargs) -> ChatStream:
+        """Streamed completion as a ChatStream of text deltas (retried until the stream opens)."""
+        model = model or self.model
+        started = time.perf_counter()
+        try:
+            chunks = self._with_retries(lambda: self.client.chat.completions.create(
+                model=model, messages=messages, stream=True,
+                stream_options={"include_usage": True}, **kwargs))
+        except Exception as e:
+            self.metrics.record(model, time.perf_counter() - started, error=e)
+            raise
+        return ChatStream(chunks, model, started, self.metrics, _prompt_chars(messages))
+
+    def _with_retries(self, call):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return call()
+            except RETRYABLE:
+                if attempt == self.max_retries:
+                    raise
+                self.metrics.retried()
+                time.sleep(_backoff(attempt))
+
+    # ── async ─────────────────────────────────────────────────────────
+
+    async def achat(self, messages: list, model: str | None = None, **kwargs):
+        model = model or self.model
+        started = time.perf_counter()
+        try:
+            response = await self._awith_retries(lambda: self.aclient.chat.completions.create(
+                model=model, messages=messages, **kwargs))
+        except Exception as e:
+            self.metrics.record(model, time.perf_counter() - started, error=e)
+            raise
+        self.metrics.record(model, time.perf_counter() - started, usage=response.usage)
+        return response
+
+    async def astream(self, messages: list, model: str | None = None, **kwargs) -> AsyncChatStream:
+        model = model or self.model
+        started = time.perf_counter()
+        try:
+            chunks = await self._awith_retries(lambda: self.aclient.chat.completions.create(
+                model=model, messages=messages, stream=True,
+                stream_options={"include_usage": True}, **kwargs))
+        except Exception as e:
+            self.metrics.record(model, time.perf_counter() - started, error=e)
+            raise
+        return AsyncChatStream(chunks, model, started, self.metrics, _prompt_chars(messages))
+
+    async def _awith_retries(self, call):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except RETRYABLE:
+                if attempt == self.max_retries:
+                    raise
+                self.metrics.retried()
+                await asyncio.sleep(_backoff(attempt))
+
+    def close(self):
+        self.client.close()
+
+    async def aclose(self):
+        self.client.close()
+        if self._aclient is not None:
+            await self._aclient.close()
+
+
+# ── LangChain ────────────────────────────────────────────────────────
+
+def _metrics_callback():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class GatewayMetricsCallback(BaseCallbackHandler):
+        """Feeds ChatOllama calls into the shared `metrics`."""
+
+        def __init__(self):
+            self._runs: dict = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            model = (kwargs.get("metadata") or {}).get("ls_model_name", "chat_model")
+            self._runs[run_id] = [model, time.perf_counter(), None]
+
+        def on_llm_new_token(self, token, *, run_id, **kwargs):
+            run = self._runs.get(run_id)
+            if run and run[2] is None:
+                run[2] = time.perf_counter() - run[1]
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            usage = None
+            generations = response.generations[0] if response.generations else []
+            message = getattr(generations[0], "message", None) if generations else None
+            meta = getattr(message, "usage_metadata", None)
+            if meta:
+                usage = _Usage(meta.get("input_tokens", 0), meta.get("output_tokens", 0))
+            metrics.record(run[0], time.perf_counter() - run[1], run[2], usage)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            run = self._runs.pop(run_id, None)
+            if run is not None:
+                metrics.record(run[0], time.perf_counter() - run[1], run[2], error=error)
+
+    return GatewayMetricsCallback()
+
+
+def chat_model(model: str | None = None, temperature: float = 0.7, timeout: float = READ_TIMEOUT,
+               pool_size: int = POOL_SIZE, **kwargs):
+    """ChatOllama with shared timeouts, pooled connections (connect retries) and metrics."""
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model=model or DEFAULT_MODEL,
+        base_url=OLLAMA_HOST,
+        temperature=temperature,
+        client_kwargs={"timeout": _timeout(timeout)},
+        # httpx transports only retry failed connects, which is safe for non-idempotent POSTs
+        sync_client_kwargs={"transport": httpx.HTTPTransport(retries=MAX_RETRIES, limits=_limits(pool_size))},
+        async_client_kwargs={"transport": httpx.AsyncHTTPTransport(retries=MAX_RETRIES, limits=_limits(pool_size))},
+        callbacks=[_metrics_callback()],
+        **kwargs,
+    )
+
@@ -1,9 +1,9 @@
-from openai import OpenAI
+# Run from the repo root:  python main.py
+from llm_gateway import LLMGateway
 
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
+llm = LLMGateway(model="gemma2:2b")
 
-response = client.chat.completions.create(
-    model="gemma2:2b",
+response = llm.chat(
     messages=[
         {"role": "user", "content": "Hello from Santhosh!"}
     ]
@@ -0,0 +1,193 @@
+"""
+Offline consolidation for mem0 memories stored in Qdrant.
+
+Every chat turn can add memories, so a long-lived user's set only grows:
+search gets slower, the prompt's memory block gets longer and
+near-duplicate facts push useful ones out of the top-k. Per user this job
+
+  1. scrolls all memories with their stored vectors (nothing is re-embedded)
+  2. clusters them greedily by cosine similarity (newest memory first,
+     everything above --threshold joins its cluster) and keeps only the
+     newest memory of each cluster, adding up the cluster's access counts
+  3. expires memories older than --max-age-days that were used fewer than
+     --min-access times (`access_count` payload, 0 when missing)
+  4. caps the user at --max-per-user memories (least used, oldest first out)
+  5. deletes everything dropped with bulk PointIdsList deletes
+
+and prints before/after counts and filtered search latency.
+
+    python -m memory_agent.consolidate --dry-run
+    python -m memory_agent.consolidate --user santhosh_local --threshold 0.9
+
+mem0's local history DB is not touched. A running chat keeps its hot set
+(memory_tiers.py) until the user is evicted or dropped.
+"""
+import argparse
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import FieldCondition, Filter, MatchValue, PointIdsList
+
+# === CONFIG ===
+QDRANT = "http://localhost:6333"
+COLLECTION = "mem0_chat_2026"
+THRESHOLD = 0.92          # cosine above this → same fact
+MAX_AGE_DAYS = 180
+MIN_ACCESS = 1
+MAX_PER_USER = 500
+DELETE_BATCH = 256
+LATENCY_QUERIES = 20
+
+
+def _user_filter(user_id: str) -> Filter:
+    return Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
+
+def _scroll(client: QdrantClient, collection: str, scroll_filter=None, with_vectors=True) -> list:
+    points, offset = [], None
+    while True:
+        batch, offset = client.scroll(
+            collection_name=collection,
+            scroll_filter=scroll_filter,
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        points.extend(batch)
+        if offset is None:
+            return points
+
+
+def _timestamp(point) -> float:
+    payload = point.payload or {}
+    value = payload.get("updated_at") or payload.get("created_at")
+    if not value:
+        return 0.0
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        return 0.0
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _access_count(point) -> int:
+    return int((point.payload or {}).get("access_count", 0))
+
+
+def plan(points: list, threshold: float, max_age_days: float, min_access: int, max_per_user: int):
+    """Returns (keep, drop, merged_counts): keep/drop are point lists, merged_counts id → summed access."""
+    points = sorted(points, key=_timestamp, reverse=True)     # newest first: it wins its cluster
+    if not points:
+        return [], [], {}
+    vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    # 1. greedy clustering, one row of similarities at a time (memory stays O(n))
+    assigned = np.zeros(len(points), dtype=bool)
+    keep, drop, merged = [], [], {}
+    for i in range(len(points)):
+        if assigned[i]:
+            continue
+        members = np.flatnonzero(~assigned & (vectors @ vectors[i] >= threshold))
+        assigned[members] = True
+        keep.append(points[i])
+        duplicates = [points[j] for j in members if j != i]
+        if duplicates:
+            drop.extend(duplicates)
+            merged[points[i].id] = sum(_access_count(points[j]) for j in members)
+
+    counts = lambda p: merged.get(p.id, _access_count(p))
+
+    # 2. expire old memories nobody used
+    cutoff = time.time() - max_age_days * 86400
+    expired = [p for p in keep if _timestamp(p) and _timestamp(p) < cutoff and counts(p) < min_access]
+    expired_ids = {p.id for p in expired}
+    keep = [p for p in keep if p.id not in expired_ids]
+    drop.extend(expired)
+
+    # 3. hard cap: least used, then oldest, go first
+    if len(keep) > max_per_user:
+        keep.sort(key=lambda p: (counts(p), _timestamp(p)), reverse=True)
+        drop.extend(keep[max_per_user:])
+        keep = keep[:max_per_user]
+
+    kept_ids = {p.id for p in keep}
+    return keep, drop, {pid: n for pid, n in merged.items() if pid in kept_ids}
+
+
+def search_latency(client: QdrantClient, collection: str, user_id: str, vectors: list) -> float:
+    """p50 ms of a filtered top-5 query, using the user's own vectors as queries."""
+    if not vectors:
+        return 0.0
+    samples = []
+    for vector in vectors[:LATENCY_QUERIES]:
+        t0 = time.perf_counter()
+        client.query_points(collection_name=collection, query=vector, query_filter=_user_filter(user_id), limit=5)
+        samples.append(time.perf_counter() - t0)
+    return float(np.percentile(samples, 50) * 1000)
+
+
+def consolidate_user(client: QdrantClient, collection: str, user_id: str, args) -> tuple[int, int]:
+    points = _scroll(client, collection, _user_filter(user_id))
+    sample = [p.vector for p in points[:LATENCY_QUERIES]]
+    before_ms = search_latency(client, collection, user_id, sample)
+
+    keep, drop, merged = plan(points, args.threshold, args.max_age_days, args.min_access, args.max_per_user)
+    print(f"👤 {user_id}: {len(points)} → {len(keep)} memories "
+          f"({len(drop)} dropped, {len(merged)} clusters merged)")
+
+    if args.dry_run or not drop:
+        return len(points), len(keep)
+
+    ids = [p.id for p in drop]
+    for i in range(0, len(ids), DELETE_BATCH):
+        client.delete(collection_name=collection, points_selector=PointIdsList(points=ids[i:i + DELETE_BATCH]), wait=True)
+    # Keepers inherit their duplicates' usage, so they don't look unused next time
+    by_count = defaultdict(list)
+    for pid, count in merged.items():
+        by_count[count].append(pid)
+    for count, pids in by_count.items():
+        client.set_payload(collection_name=collection, payload={"access_count": count}, points=pids)
+
+    after_ms = search_latency(client, collection, user_id, sample)
+    print(f"   search p50: {before_ms:.2f} ms → {after_ms:.2f} ms")
+    return len(points), len(keep)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate and expire mem0 memories in Qdrant")
+    parser.add_argument("--url", default=QDRANT)
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--user", action="append", help="user id (repeatable, default: every user)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--max-age-days", type=float, default=MAX_AGE_DAYS)
+    parser.add_argument("--min-access", type=int, default=MIN_ACCESS)
+    parser.add_argument("--max-per-user", type=int, default=MAX_PER_USER)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be dropped")
+    args = parser.parse_args()
+
+    client = QdrantClient(url=args.url)
+    users = args.user or sorted({
+        (p.payload or {}).get("user_id")
+        for p in _scroll(client, args.collection, with_vectors=False)
+        if (p.payload or {}).get("user_id")
+    })
+
+    start = time.perf_counter()
+    before = after = 0
+    for user_id in users:
+        b, a = consolidate_user(client, args.collection, user_id, args)
+        before, after = before + b, after + a
+
+    mode = " (dry run)" if args.dry_run else ""
+    print(f"✅ {len(users)} users, {before} → {after} memories{mode} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Memory service around a mem0 `Memory`, so chat turns don't wait on bookkeeping.
+
+- search(): runs in a small thread pool and returns a Future, so the caller
+  can prepare the rest of the prompt while the embed + Qdrant query runs.
+- add_turn(): only puts the turn on a bounded queue. A background writer
+  drains it and saves all queued turns of a user with ONE memory.add call
+  (one extraction LLM call + embeddings + Qdrant write per flush, not per
+  turn). When the queue is full, add_turn blocks (backpressure) instead of
+  dropping memories.
+- close(): flushes what's left, so nothing is lost on exit.
+
+Per-turn latency is then search + generation only.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+MAX_PENDING_TURNS = 32      # bounded queue → backpressure if the writer falls behind
+MAX_TURNS_PER_FLUSH = 8     # turns coalesced into one memory.add
+FLUSH_WAIT = 1.0            # seconds to wait for more turns before flushing
+
+_STOP = object()
+
+
+def memory_results(raw) -> list[dict]:
+    """mem0 returns {"results": [...]} (v1.1) or a plain list (older versions)."""
+    if isinstance(raw, dict):
+        raw = raw.get("results", [])
+    return [m if isinstance(m, dict) else {"memory": getattr(m, "memory", str(m))} for m in raw or []]
+
+
+class MemoryService:
+    def __init__(
+        self,
+        memory,
+        max_pending: int = MAX_PENDING_TURNS,
+        max_turns_per_flush: int = MAX_TURNS_PER_FLUSH,
+        flush_wait: float = FLUSH_WAIT,
+        search_workers: int = 2,
+    ):
+        self.memory = memory
+        self.max_turns_per_flush = max_turns_per_flush
+        self.flush_wait = flush_wait
+
+        self._pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._search_pool = ThreadPoolExecutor(max_workers=search_workers, thread_name_prefix="mem-search")
+        self._writer = threading.Thread(target=self._write_loop, name="mem-writer", daemon=True)
+        self._writer.start()
+        self.stats = {"searches": 0, "turns": 0, "flushes": 0, "add_errors": 0, "add_ms": 0.0}
+
+    # ── read path ─────────────────────────────────────────────────────
+
+    def search(self, query: str, user_id: str, limit: int = 5) -> Future:
+        """Start a memory search; .result() gives a list of {"memory": ...} dicts."""
+        self.stats["searches"] += 1
+        return self._search_pool.submit(self._search, query, user_id, limit)
+
+    def _search(self, query: str, user_id: str, limit: int) -> list[dict]:
+        return memory_results(self.memory.search(query=query, user_id=user_id, limit=limit))
+
+    # ── write path ────────────────────────────────────────────────────
+
+    def add_turn(self, user_id: str, messages: list[dict]):
+        """Queue a turn for saving; returns immediately unless the queue is full."""
+        self.stats["turns"] += 1
+        self._pending.put((user_id, messages))
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            if item is _STOP:
+                self._pending.task_done()
+                return
+            batch, stop = [item], False
+
+            # Give the next turn(s) a moment to arrive, then take what's queued
+            deadline = time.monotonic() + self.flush_wait
+            while len(batch) < self.max_turns_per_flush:
+                try:
+                    nxt = self._pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+
+            self._flush(batch)
+            for _ in range(len(batch) + stop):
+                self._pending.task_done()
+            if stop:
+                return
+
+    def _flush(self, batch: list[tuple[str, list[dict]]]):
+        by_user: dict[str, list[dict]] = {}
+        for user_id, messages in batch:
+            by_user.setdefault(user_id, []).extend(messages)
+
+        for user_id, messages in by_user.items():
+            start = time.perf_counter()
+            try:
+                self.memory.add(messages=messages, user_id=user_id)
+            except Exception as e:
+                # Losing one batch of memories must not kill the writer
+                self.stats["add_errors"] += 1
+                print(f"\n⚠️ memory.add failed ({len(messages)} messages): {e}")
+            else:
+                self.stats["flushes"] += 1
+                self.stats["add_ms"] += (time.perf_counter() - start) * 1000
+
+    def flush(self):
+        """Block until every queued turn has been written."""
+        self._pending.join()
+
+    def close(self):
+        self._pending.put(_STOP)
+        self._writer.join()
+        self._search_pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
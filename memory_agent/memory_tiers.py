@@ -0,0 +1,254 @@
+"""
+Tiered memory store: an in-process hot tier in front of mem0's Qdrant collection.
+
+TieredMemory has the same search()/add() signature as mem0's Memory, so it
+can be passed straight to MemoryService.
+
+Hot tier (per user, in process):
+  - the user's newest memories (up to `per_user`) with their stored vectors,
+    pulled from Qdrant once (scroll, with_vectors) in the background
+  - search = embed the query + one NumPy matrix-vector product, no Qdrant call
+  - LRU by user: at most `max_users` users are kept hot
+  - write-through: after memory.add, ADD/UPDATE/DELETE events are applied
+    to the hot set (vectors fetched by id, nothing is embedded twice)
+
+Hot hits are written back as the `access_count` payload when a user is
+evicted or on close(), which consolidate.py uses to expire unused memories.
+
+Cold tier: the regular memory.search against Qdrant. It's used while a
+user's hot set is still loading, and when a user has more memories than
+fit in the hot set and the hot results aren't good enough.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from qdrant_client.models import FieldCondition, Filter, MatchValue
+
+MAX_HOT_USERS = 64
+PER_USER = 512            # memories kept hot per user (newest first)
+MIN_HOT_SCORE = 0.5       # partial hot set: fall back to Qdrant below this
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _point_time(point) -> str:
+    payload = point.payload or {}
+    return payload.get("updated_at") or payload.get("created_at") or ""
+
+
+class _UserSet:
+    """One user's hot memories: ids/texts plus a (n, dim) matrix of unit vectors."""
+
+    def __init__(self, points, complete: bool):
+        self.ids = [str(p.id) for p in points]
+        self.texts = [(p.payload or {}).get("data", "") for p in points]
+        self.vectors = _normalize(np.asarray([p.vector for p in points], dtype=np.float32)) if points else None
+        self.hits = np.zeros(len(points), dtype=np.int64)          # since load
+        self.base_hits = np.asarray([(p.payload or {}).get("access_count", 0) for p in points], dtype=np.int64)
+        # complete → every memory of the user is here, so the hot result is authoritative
+        self.complete = complete
+
+    def search(self, query_vec: np.ndarray, limit: int) -> list[dict]:
+        if self.vectors is None or not len(self.ids):
+            return []
+        scores = self.vectors @ query_vec
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        self.hits[top] += 1
+        return [{"id": self.ids[i], "memory": self.texts[i], "score": float(scores[i])} for i in top]
+
+    def upsert(self, point, max_size: int):
+        vec = _normalize(np.asarray(point.vector, dtype=np.float32))
+        text = (point.payload or {}).get("data", "")
+        pid = str(point.id)
+        if pid in self.ids:
+            i = self.ids.index(pid)
+            self.texts[i], self.vectors[i] = text, vec
+            return
+        if len(self.ids) >= max_size:
+            # full: drop the least used memory, the set is no longer the whole picture
+            self.remove(self.ids[int(np.argmin(self.hits))])
+            self.complete = False
+        self.ids.append(pid)
+        self.texts.append(text)
+        self.vectors = vec[None, :] if self.vectors is None else np.vstack([self.vectors, vec])
+        self.hits = np.append(self.hits, 0)
+        self.base_hits = np.append(self.base_hits, 0)
+
+    def remove(self, memory_id: str):
+        if memory_id not in self.ids:
+            return
+        i = self.ids.index(memory_id)
+        del self.ids[i], self.texts[i]
+        self.vectors = np.delete(self.vectors, i, axis=0)
+        self.hits = np.delete(self.hits, i)
+        self.base_hits = np.delete(self.base_hits, i)
+
+    def access_counts(self) -> dict[int, list[str]]:
+        """New total access count → ids, for memories used since the load."""
+        by_count = defaultdict(list)
+        for i in np.flatnonzero(self.hits):
+            by_count[int(self.base_hits[i] + self.hits[i])].append(self.ids[i])
+        return by_count
+
+
+class TieredMemory:
+    def __init__(
+        self,
+        memory,
+        max_users: int = MAX_HOT_USERS,
+        per_user: int = PER_USER,
+        min_score: float = MIN_HOT_SCORE,
+    ):
+        self.memory = memory
+        self.client = memory.vector_store.client
+        self.collection = memory.vector_store.collection_name
+        self.max_users = max_users
+        self.per_user = per_user
+        self.min_score = min_score
+
+        self._users: OrderedDict[str, _UserSet] = OrderedDict()
+        self._loading: set[str] = set()
+        self._lock = threading.Lock()
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mem-hot-load")
+        self.stats = {"hot_hits": 0, "misses": 0, "fallbacks": 0, "loads": 0, "evictions": 0,
+                      "hot_ms": 0.0, "cold_ms": 0.0}
+
+    # ── read path ─────────────────────────────────────────────────────
+
+    def search(self, query: str, user_id: str, limit: int = 5, **kwargs):
+        with self._lock:
+            hot = self._users.get(user_id)
+            if hot is not None:
+                self._users.move_to_end(user_id)
+
+        if hot is None:
+            self.stats["misses"] += 1
+            self._load_in_background(user_id)
+            return self._cold_search(query, user_id, limit, **kwargs)
+
+        start = time.perf_counter()
+        query_vec = _normalize(np.asarray(self._embed(query), dtype=np.float32))
+        with self._lock:
+            results = hot.search(query_vec, limit)
+            complete = hot.complete
+        if not complete and (not results or results[0]["score"] < self.min_score):
+            self.stats["fallbacks"] += 1
+            return self._cold_search(query, user_id, limit, **kwargs)
+
+        self.stats["hot_hits"] += 1
+        self.stats["hot_ms"] += (time.perf_counter() - start) * 1000
+        return {"results": results}
+
+    def _cold_search(self, query: str, user_id: str, limit: int, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.memory.search(query=query, user_id=user_id, limit=limit, **kwargs)
+        finally:
+            self.stats["cold_ms"] += (time.perf_counter() - start) * 1000
+
+    def _embed(self, text: str):
+        try:
+            return self.memory.embedding_model.embed(text, "search")
+        except TypeError:
+            # older mem0 embedders take only the text
+            return self.memory.embedding_model.embed(text)
+
+    # ── hot set loading / eviction ────────────────────────────────────
+
+    def _user_filter(self, user_id: str) -> Filter:
+        return Filter(must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))])
+
+    def _load_in_background(self, user_id: str):
+        with self._lock:
+            if user_id in self._loading:
+                return
+            self._loading.add(user_id)
+        self._loader.submit(self._load, user_id).add_done_callback(lambda _: self._loading.discard(user_id))
+
+    def _load(self, user_id: str):
+        points, offset = [], None
+        while True:
+            batch, offset = self.client.scroll(
+                collection_name=self.collection,
+                scroll_filter=self._user_filter(user_id),
+                limit=256,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            points.extend(batch)
+            if offset is None:
+                break
+
+        points.sort(key=_point_time, reverse=True)
+        user_set = _UserSet(points[:self.per_user], complete=len(points) <= self.per_user)
+        evicted = []
+        with self._lock:
+            self._users[user_id] = user_set
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                evicted.append(self._users.popitem(last=False)[1])
+                self.stats["evictions"] += 1
+        self.stats["loads"] += 1
+        for old in evicted:
+            self._save_access_counts(old)
+
+    def _save_access_counts(self, user_set: _UserSet):
+        with self._lock:
+            by_count = user_set.access_counts()
+            user_set.base_hits += user_set.hits
+            user_set.hits[:] = 0
+        for count, ids in by_count.items():
+            self.client.set_payload(collection_name=self.collection, payload={"access_count": count}, points=ids)
+
+    def drop(self, user_id: str):
+        """Forget a user's hot set (e.g. after the collection was rewritten)."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    # ── write path ────────────────────────────────────────────────────
+
+    def add(self, messages, user_id: str, **kwargs):
+        result = self.memory.add(messages=messages, user_id=user_id, **kwargs)
+        with self._lock:
+            hot = self._users.get(user_id)
+        if hot is None:
+            return result    # not hot: the next load picks the new memories up
+
+        events = result.get("results", []) if isinstance(result, dict) else result or []
+        deleted = [e["id"] for e in events if e.get("event") == "DELETE"]
+        changed = [e["id"] for e in events if e.get("event") in ("ADD", "UPDATE")]
+        points = self.client.retrieve(self.collection, ids=changed, with_payload=True, with_vectors=True) if changed else []
+
+        with self._lock:
+            for memory_id in deleted:
+                hot.remove(str(memory_id))
+            for point in points:
+                hot.upsert(point, self.per_user)
+        return result
+
+    # ── metrics ───────────────────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hot_hits"] + self.stats["misses"] + self.stats["fallbacks"]
+        cold = self.stats["misses"] + self.stats["fallbacks"]
+        return {
+            **self.stats,
+            "hot_users": len(self._users),
+            "hit_rate": self.stats["hot_hits"] / lookups if lookups else 0.0,
+            "avg_hot_ms": self.stats["hot_ms"] / self.stats["hot_hits"] if self.stats["hot_hits"] else 0.0,
+            "avg_cold_ms": self.stats["cold_ms"] / cold if cold else 0.0,
+        }
+
+    def close(self):
+        self._loader.shutdown(wait=True)
+        for user_set in list(self._users.values()):
+            self._save_access_counts(user_set)
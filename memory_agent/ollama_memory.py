@@ -1,11 +1,15 @@
 # Ollamm not wokring with mem0
+# Run from the repo root:  python -m memory_agent.ollama_memory
 
+from llm_gateway import BASE_URL, LLMGateway
 from mem0 import Memory
-from openai import OpenAI
+
+from .memory_service import MemoryService
+from .memory_tiers import TieredMemory
 
 # ──── CONFIGURATION ────────────────────────────────────────────────
 
-OLLAMA_API_BASE = "http://localhost:11434/v1"
+OLLAMA_API_BASE = BASE_URL               # same endpoint as llm_gateway (LLM_BASE_URL)
 QDRANT_HOST = "localhost"
 QDRANT_PORT = 6333
 COLLECTION_NAME = "mem0_chat_2026"   # Change if you want fresh start
@@ -13,11 +17,8 @@ COLLECTION_NAME = "mem0_chat_2026"   # Change if you want fresh start
 USER_ID = "santhosh_local"           # Your personal identifier
 LLM_MODEL = "gemma2:2b"              # or "llama3.2:3b", etc.
 
-# LLM client (OpenAI compatible)
-llm_client = OpenAI(
-    base_url=OLLAMA_API_BASE,
-    api_key="ollama",                # dummy value - ignored by Ollama
-)
+# LLM client (OpenAI compatible, pooled, with timeouts + retries)
+llm = LLMGateway(model=LLM_MODEL)
 
 # ──── MEM0 CONFIGURATION ───────────────────────────────────────────
 
@@ -60,68 +61,74 @@ print(f"  • Collection: {COLLECTION_NAME}")
 print("-" * 70)
 
 memory = Memory.from_config(config)
+# Active users are searched in-process, Qdrant only on a miss (memory_tiers.py)
+memory_tiers = TieredMemory(memory)
+# Saving memories runs in the background, search overlaps prompt prep
+memory_service = MemoryService(memory_tiers)
 
 print("Mem0 initialized successfully ✓\n")
 
+SYSTEM_TEMPLATE = """You are a helpful, concise and friendly assistant.
+You remember important things about the user from previous conversations.
+
+Relevant memories:
+{memory_text}
+
+Answer naturally."""
+
 # ──── CHAT LOOP ────────────────────────────────────────────────────
 
 print("Chat ready! (type exit / quit / bye to finish)\n")
 
-while True:
-    try:
-        user_input = input("You: ").strip()
+try:
+    while True:
+        try:
+            user_input = input("You: ").strip()
 
-        if user_input.lower() in {"exit", "quit", "bye", "q"}:
-            print("\nGoodbye! 👋\n")
-            break
+            if user_input.lower() in {"exit", "quit", "bye", "q"}:
+                print("\nGoodbye! 👋\n")
+                break
 
-        if not user_input:
-            continue
+            if not user_input:
+                continue
 
-        # Retrieve relevant memories
-        memories = memory.search(
-            query=user_input,
-            user_id=USER_ID,
-            limit=5
-        )
+            # Retrieve relevant memories (runs while the request is prepared)
+            search = memory_service.search(user_input, user_id=USER_ID, limit=5)
+            user_message = {"role": "user", "content": user_input}
 
-        memory_text = "\n".join(f"• {m.memory.strip()}" for m in memories) if memories else "(no relevant memories found)"
+            memories = search.result()
+            memory_text = "\n".join(f"• {m['memory'].strip()}" for m in memories) if memories else "(no relevant memories found)"
 
-        system_prompt = f"""You are a helpful, concise and friendly assistant.
-You remember important things about the user from previous conversations.
+            # Generate response
+            response = llm.chat(
+                messages=[
+                    {"role": "system", "content": SYSTEM_TEMPLATE.format(memory_text=memory_text)},
+                    user_message,
+                ],
+                temperature=0.75,
+                max_tokens=1400,
+            )
 
-Relevant memories:
-{memory_text}
+            answer = response.choices[0].message.content.strip()
 
-Answer naturally."""
+            print("\nAI  :", answer)
+            print("-" * 70)
+
+            # Save the conversation turn (queued, written in the background)
+            memory_service.add_turn(
+                USER_ID,
+                [user_message, {"role": "assistant", "content": answer}],
+            )
 
-        # Generate response
-        response = llm_client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            temperature=0.75,
-            max_tokens=1400,
-        )
-
-        answer = response.choices[0].message.content.strip()
-
-        print("\nAI  :", answer)
-        print("-" * 70)
-
-        # Save the conversation turn
-        memory.add(
-            messages=[
-                {"role": "user", "content": user_input},
-                {"role": "assistant", "content": answer}
-            ],
-            user_id=USER_ID
-        )
-
-    except KeyboardInterrupt:
-        print("\nInterrupted. Goodbye!")
-        break
-    except Exception as e:
-        print(f"\nError: {str(e)}\nContinuing anyway...\n")
\ No newline at end of file
+        except KeyboardInterrupt:
+            print("\nInterrupted. Goodbye!")
+            break
+        except Exception as e:
+            print(f"\nError: {str(e)}\nContinuing anyway...\n")
+finally:
+    print("Saving memories...")
+    memory_service.close()
+    memory_tiers.close()
+    m = memory_tiers.metrics()
+    print(f"📊 hot hit rate {m['hit_rate']:.0%}  "
+          f"(hot {m['avg_hot_ms']:.1f} ms vs Qdrant {m['avg_cold_ms']:.1f} ms avg)")
@@ -1,13 +1,18 @@
+# Run from the repo root:  python -m memory_agent.openai_memory
 from dotenv import load_dotenv
+from llm_gateway import LLMGateway
 from mem0 import Memory
 import os
-from openai import OpenAI
 import json
+
+from .memory_service import MemoryService
+
 load_dotenv()
 
 
-client = OpenAI()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# https endpoint → pooled HTTP/2 connection (see llm_gateway.py)
+llm = LLMGateway(base_url="https://api.openai.com/v1", api_key=OPENAI_API_KEY, model="gpt-4o-mini")
 
 config ={
     "version":"v1.1",
@@ -30,36 +35,37 @@ config ={
 }
 
 mem_client = Memory.from_config(config)
+memory_service = MemoryService(mem_client)
 
-while True:
-
-    user_query=input("> ")
-    # gives only the relevant memory
-    search_memory= mem_client.search(query=user_query, user_id='some_random_id_001')
+try:
+    while True:
 
-    memories =[
-        f"ID: {mem.get("id")}\nMemory: {mem.get("memmory")}" for mem in search_memory.get("results")
-    ]
+        user_query=input("> ")
+        # gives only the relevant memory (search runs while the request is prepared)
+        search_memory= memory_service.search(user_query, user_id='some_random_id_001')
+        user_message = {"role": "user", "content": user_query}
 
-    SYSTEM_PROMPT=f"""
-    Here is the context about the user:
-    {json.dumps(memories)}
-    """
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_query}
+        memories =[
+            f"ID: {mem.get('id')}\nMemory: {mem.get('memory')}" for mem in search_memory.result()
         ]
-    )
 
-    ai_response =response.choices[0].message.content
-    print(ai_response)
-    mem_client.add(
-        user_id="some_random_id_001",
-        messages=[
-            {"role": "user", "content": user_query},
-        {"role": "assistant", "content": ai_response}
-        ]
-        
-    )
\ No newline at end of file
+        SYSTEM_PROMPT=f"""
+        Here is the context about the user:
+        {json.dumps(memories)}
+        """
+        response = llm.chat(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                user_message
+            ]
+        )
+
+        ai_response =response.choices[0].message.content
+        print(ai_response)
+        # queued; memory.add runs in the background, several turns per call
+        memory_service.add_turn(
+            "some_random_id_001",
+            [user_message, {"role": "assistant", "content": ai_response}],
+        )
+finally:
+    memory_service.close()
@@ -1,7 +1,8 @@
-from openai import OpenAI
+# Run from the repo root:  python -m prompt_types.allTypes
+from llm_gateway import LLMGateway
 
-# Connect to local Ollama server running Gemma 2B
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
+# Connect to local Ollama server running Gemma 2B (pooled client, timeouts, retries)
+llm = LLMGateway(model="gemma2:2b")
 
 # --- Persona setting ---
 persona = "You are a friendly and witty assistant who explains things in simple terms with humor."
@@ -64,10 +65,7 @@ match prompt_type:
         )
 
 # Send the request
-response = client.chat.completions.create(
-    model="gemma2:2b",
-    messages=messages
-)
+response = llm.chat(messages)
 
 # Print model response
 print("\n=== MODEL RESPONSE ===")
@@ -1,6 +1,16 @@
-from openai import OpenAI
+# Run from the repo root:  python "prompt_types/chainOf Thought.py"
+# (the space in the file name rules out python -m, so put the repo root on sys.path)
+import sys
+from pathlib import Path
 
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json
+
+from llm_gateway import LLMGateway
+from prompt_types.step_stream import StepEngine
+
+llm = LLMGateway(model="gemma2:2b")
 
 SYSTEM_PROMPT = """
 You're an expert AI Assistant in resolving user queries using chain of thought method.
@@ -10,7 +20,8 @@ Once you think enough PLAN has been done, finally you can give an OUTPUT.
 
 Rules:
 - Strictly Follow the given JSON output format
-- Only run one step at a time.
+- Write each step as one JSON object on its own line. You can write several steps in one reply.
+- Stop right after the OUTPUT step.
 - The sequence of steps is START (where user gives an input), PLAN (That can be multiple times) and OUTPUT.
 
 Output JSON Format:
@@ -30,26 +41,22 @@ PLAN: { "step": "PLAN", "content": "Great, we have solved and finally left with
 OUTPUT: { "step": "OUTPUT", "content": "3.5" }
 """
 
-messages = [
-    {"role": "system", "content": SYSTEM_PROMPT},
-]
+# Streams the steps, stops at OUTPUT, re-sends only the last few PLAN steps
+engine = StepEngine(llm, SYSTEM_PROMPT, temperature=0.2)
 
 def main():
     user_query = input("User: ")
-    messages.append({"role": "user", "content": user_query})
 
-    while True:
-        response = client.chat.completions.create(
-            model="gemma2:2b",
-            messages=messages,
-            temperature=0.2
-        )
-        res = response.choices[0].message.content
-        print(res)
+    result = engine.run(user_query, on_step=lambda step: print(json.dumps(step)))
 
-        messages.append({"role": "assistant", "content": res})
+    # Also covers plain-text replies (no steps parsed) and running out of calls
+    if result.output is None:
+        print(f"\n⚠️ No OUTPUT step after {result.calls} LLM calls")
+    else:
+        print(f"\n🤖 {result.output}")
 
-        if '"step": "OUTPUT"' in res:
-            break
+    approx = "~" if result.tokens_estimated else ""
+    print(f"\n{len(result.steps)} steps in {result.calls} LLM calls, "
+          f"{approx}{result.prompt_tokens} prompt + {approx}{result.completion_tokens} completion tokens")
 
 main()
@@ -0,0 +1,179 @@
+"""
+Streaming engine for the JSON step loops ({"step": "PLAN", "content": ...}).
+
+The old loop made one blocking call per step, re-sent the whole growing
+transcript each time, and looked for '"step": "OUTPUT"' as a substring.
+StepEngine instead
+
+  - streams the completion and parses JSON step objects as they close
+    (StepParser, brace/string aware, ignores text around the objects)
+  - lets the model write as many steps per call as it wants
+  - stops generation as soon as an OUTPUT or TOOL step is complete, so no
+    tokens are spent on whatever the model would ramble on with
+  - runs TOOL steps ({"step": "TOOL", "tool": name, "input": ...}) and
+    feeds the result back as an OBSERVE step
+  - re-sends only the last `keep_plans` PLAN steps on the next call (the
+    older ones are replaced by a one-line note)
+
+Works with any llm_gateway.LLMGateway.
+"""
+import json
+from dataclasses import dataclass, field
+
+MAX_CALLS = 8         # LLM calls per query before giving up
+KEEP_PLANS = 3        # PLAN steps re-sent verbatim on the next call
+STOP_STEPS = ("OUTPUT", "TOOL")
+
+
+class StepParser:
+    """Feed text chunks, get back every complete {"step": ...} object."""
+
+    def __init__(self):
+        self._buf: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> list[dict]:
+        steps = []
+        for ch in text:
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth, self._buf = 1, ["{"]
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads("".join(self._buf))
+                    except ValueError:
+                        continue     # not valid JSON, skip it
+                    if isinstance(obj, dict) and "step" in obj:
+                        steps.append(obj)
+        return steps
+
+
+@dataclass
+class StepResult:
+    output: str | None
+    steps: list[dict] = field(default_factory=list)
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_estimated: bool = False     # some call stopped before the server sent usage
+
+
+def _kind(step: dict) -> str:
+    return str(step.get("step", "")).upper()
+
+
+class StepEngine:
+    def __init__(
+        self,
+        llm,
+        system_prompt: str,
+        tools: dict | None = None,
+        stop_steps=STOP_STEPS,
+        keep_plans: int = KEEP_PLANS,
+        max_calls: int = MAX_CALLS,
+        **llm_kwargs,
+    ):
+        self.llm = llm
+        self.system_prompt = system_prompt
+        self.tools = tools or {}
+        self.stop_steps = {s.upper() for s in stop_steps}
+        self.keep_plans = keep_plans
+        self.max_calls = max_calls
+        self.llm_kwargs = llm_kwargs
+
+    def run(self, query: str, on_step=None) -> StepResult:
+        result = StepResult(output=None)
+        while result.calls < self.max_calls:
+            stop, new_steps, raw = self._call(query, result, on_step)
+
+            if stop is None:
+                if not new_steps:
+                    # Nothing parseable came back: take the raw text as the answer
+                    result.output = raw.strip() or None
+                    return result
+                continue    # model paused mid-plan, let it go on
+
+            if _kind(stop) == "OUTPUT":
+                result.output = stop.get("content")
+                return result
+
+            observation = self._run_tool(stop)
+            result.steps.append(observation)
+            if on_step:
+                on_step(observation)
+        return result
+
+    def _call(self, query: str, result: StepResult, on_step):
+        stream = self.llm.stream(self._messages(query, result.steps), **self.llm_kwargs)
+        result.calls += 1
+        parser, parts, new_steps, stop = StepParser(), [], [], None
+        try:
+            for delta in stream:
+                parts.append(delta)
+                for step in parser.feed(delta):
+                    new_steps.append(step)
+                    if on_step:
+                        on_step(step)
+                    if _kind(step) in self.stop_steps:
+                        stop = step
+                        break
+                if stop is not None:
+                    break        # early stop: close the stream, no more tokens
+        finally:
+            stream.close()
+        result.steps.extend(new_steps)
+        # Early-stopped calls never see the final usage chunk; the gateway
+        # then estimates it from the prompt and the text received
+        if stream.usage:
+            result.prompt_tokens += stream.usage.prompt_tokens
+            result.completion_tokens += stream.usage.completion_tokens
+            result.tokens_estimated |= stream.usage_estimated
+        return stop, new_steps, "".join(parts)
+
+    def _run_tool(self, step: dict) -> dict:
+        name = step.get("tool")
+        fn = self.tools.get(name)
+        if fn is None:
+            content = f"unknown tool {name!r}, available: {sorted(self.tools)}"
+        else:
+            try:
+                content = str(fn(step.get("input")))
+            except Exception as e:
+                content = f"tool {name} failed: {e}"
+        return {"step": "OBSERVE", "tool": name, "content": content}
+
+    def _messages(self, query: str, steps: list[dict]) -> list[dict]:
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": query},
+        ]
+        if not steps:
+            return messages
+
+        # Keep START/TOOL/OBSERVE steps and only the newest few PLAN steps
+        plans = [i for i, s in enumerate(steps) if _kind(s) == "PLAN"]
+        dropped = set(plans[:-self.keep_plans]) if self.keep_plans else set(plans)
+        kept = [s for i, s in enumerate(steps) if i not in dropped]
+        lines = [json.dumps(s) for s in kept]
+        if dropped:
+            note = {"step": "PLAN", "content": f"({len(dropped)} earlier planning steps done)"}
+            lines.insert(0, json.dumps(note))
+        messages.append({"role": "assistant", "content": "\n".join(lines)})
+        return messages
@@ -0,0 +1,138 @@
+"""
+Semantic answer cache for the RAG worker, stored in Redis/Valkey.
+
+Lookups first try an exact match on the normalized question, then compare
+the question embedding against the cached questions and reuse the answer
+when cosine similarity is above `threshold`. A semantic hit also needs the
+same code identifiers in both questions (fs.readFile vs fs.writeFile embed
+almost identically but need different answers). Entries expire after `ttl`
+seconds and only the `max_entries` most recently used ones are kept.
+
+Everything lives under a per-(collection, model) namespace that also
+contains a generation number; `invalidate()` bumps the generation after a
+re-index, so old answers are never served again and simply expire.
+"""
+import hashlib
+import time
+
+import numpy as np
+from redis import Redis
+
+from .hybrid import CODE_RE
+
+PREFIX = "rag:answers"
+
+
+def _normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _identifiers(query: str) -> frozenset[str]:
+    return frozenset(m.rstrip("()") for m in CODE_RE.findall(query))
+
+
+def _generation_key(collection: str) -> str:
+    return f"{PREFIX}:{collection}:generation"
+
+
+def invalidate(conn: Redis, collection: str) -> int:
+    """Drop every cached answer for `collection` (called by rag.index after changes)."""
+    return conn.incr(_generation_key(collection))
+
+
+class AnswerCache:
+    def __init__(
+        self,
+        conn: Redis,
+        embedder,
+        collection: str,
+        model: str,
+        threshold: float = 0.95,
+        ttl: int = 3600,
+        max_entries: int = 1000,
+    ):
+        self.conn = conn
+        self.embedder = embedder
+        self.collection = collection
+        self.model = model
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _namespace(self) -> str:
+        generation = int(self.conn.get(_generation_key(self.collection)) or 0)
+        return f"{PREFIX}:{self.collection}:{self.model}:{generation}"
+
+    def lookup(self, query: str) -> str | None:
+        ns = self._namespace()
+        normalized = _normalize(query)
+        entry_id = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+        # 1. Exact match → no embedding needed at all
+        answer = self.conn.hget(f"{ns}:entry:{entry_id}", "answer")
+        if answer is not None:
+            self.conn.zadd(f"{ns}:lru", {entry_id: time.time()})
+            return answer.decode("utf-8")
+
+        # 2. Nearest cached question by cosine similarity, among the ones
+        #    that name exactly the same APIs
+        ids = self.conn.zrevrange(f"{ns}:lru", 0, self.max_entries - 1)
+        if not ids:
+            return None
+        pipe = self.conn.pipeline(transaction=False)
+        for cached_id in ids:
+            pipe.hmget(f"{ns}:entry:{cached_id.decode()}", "query", "vector")
+        rows = pipe.execute()
+
+        expired = [cached_id for cached_id, (_, blob) in zip(ids, rows) if blob is None]
+        if expired:
+            self.conn.zrem(f"{ns}:lru", *expired)
+        identifiers = _identifiers(query)
+        live = [
+            (cached_id, blob)
+            for cached_id, (cached_query, blob) in zip(ids, rows)
+            if blob is not None and _identifiers(cached_query.decode("utf-8")) == identifiers
+        ]
+        if not live:
+            return None
+
+        matrix = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in live])
+        vec = self._vector(query)
+        scores = matrix @ vec / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(vec) + 1e-12)
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        best_id = live[best][0].decode()
+        answer = self.conn.hget(f"{ns}:entry:{best_id}", "answer")
+        if answer is None:
+            return None
+        self.conn.zadd(f"{ns}:lru", {best_id: time.time()})
+        return answer.decode("utf-8")
+
+    def store(self, query: str, answer: str):
+        ns = self._namespace()
+        normalized = _normalize(query)
+        entry_id = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        entry_key = f"{ns}:entry:{entry_id}"
+
+        pipe = self.conn.pipeline(transaction=False)
+        pipe.hset(entry_key, mapping={
+            "query": query,
+            "answer": answer,
+            "vector": self._vector(query).tobytes(),
+        })
+        pipe.expire(entry_key, self.ttl)
+        pipe.zadd(f"{ns}:lru", {entry_id: time.time()})
+        pipe.expire(f"{ns}:lru", self.ttl)
+        pipe.zcard(f"{ns}:lru")
+        size = pipe.execute()[-1]
+
+        # LRU eviction: drop the least recently used entries above the cap
+        if size > self.max_entries:
+            evicted = self.conn.zpopmin(f"{ns}:lru", size - self.max_entries)
+            if evicted:
+                self.conn.delete(*[f"{ns}:entry:{member.decode()}" for member, _ in evicted])
+
+    def _vector(self, query: str) -> np.ndarray:
+        return np.asarray(self.embedder.embed_query(query), dtype=np.float32)
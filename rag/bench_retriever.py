@@ -0,0 +1,76 @@
+"""
+Recall + latency: local in-process index vs. remote Qdrant.
+
+Query vectors are stored chunk vectors with a bit of noise added, so no
+embedding calls are needed. Ground truth is an exact NumPy scan over the
+whole snapshot.
+
+    python -m rag.local_index          # snapshot first
+    python -m rag.bench_retriever --queries 200 --k 4
+"""
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from .local_index import COLLECTION, DEFAULT_DIR, NPROBE, QDRANT, LocalIndex
+
+
+def _percentiles(samples: list[float]) -> str:
+    ms = np.asarray(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):.3f} ms, p95 {np.percentile(ms, 95):.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local index vs Qdrant")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--nprobe", type=int, default=None)
+    args = parser.parse_args()
+
+    index = LocalIndex.load(DEFAULT_DIR, nprobe=args.nprobe or NPROBE)
+    vectors = np.asarray(index.vectors)
+    rng = np.random.default_rng(0)
+    rows = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[rows] + rng.normal(scale=args.noise, size=(len(rows), vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    # Ground truth: exact scan
+    truth = []
+    for q in queries:
+        scores = vectors @ q
+        truth.append({index.ids[i] for i in np.argsort(-scores)[:args.k]})
+
+    mode = "IVF" if index.centroids is not None else "brute force"
+    print(f"{len(index)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, k={args.k}, local mode: {mode}")
+
+    # Local index
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        docs = index.search(q, args.k)
+        latencies.append(time.perf_counter() - t0)
+        hits += len(expected & {d.metadata["_id"] for d in docs})
+    print(f"local : recall@{args.k} {hits / (len(queries) * args.k):.3f}, {_percentiles(latencies)}")
+
+    # Batched local search (how the worker calls it)
+    t0 = time.perf_counter()
+    index.search_batch(queries, [args.k] * len(queries))
+    per_query = (time.perf_counter() - t0) / len(queries)
+    print(f"local batched: {per_query * 1e6:.1f} µs/query")
+
+    # Qdrant
+    client = QdrantClient(url=QDRANT)
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        points = client.query_points(collection_name=COLLECTION, query=q.tolist(), limit=args.k).points
+        latencies.append(time.perf_counter() - t0)
+        hits += len(expected & {str(p.id) for p in points})
+    print(f"qdrant: recall@{args.k} {hits / (len(queries) * args.k):.3f}, {_percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+BM25 keyword index over the chunks stored by rag/index.py.
+
+Dense search is weak on exact API names (`fs.createReadStream`), so the
+tokenizer keeps dotted identifiers whole *and* emits their parts; a query
+for the full name then scores the chunks that contain it verbatim highest.
+
+The index is built from the Qdrant payloads (same chunks, same point ids)
+and saved as JSON; rag.index rebuilds it after every run that changed
+something.
+
+    python -m rag.bm25                 # rebuild by hand
+"""
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+COLLECTION = "nodejs_pdf"
+QDRANT = "http://localhost:6333"
+DEFAULT_PATH = Path(__file__).parent / ".bm25.json"
+
+# identifiers incl. dotted paths (fs.createReadStream, process.env.NODE_ENV) and numbers
+TOKEN_RE = re.compile(r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*|\d+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for match in TOKEN_RE.findall(text):
+        token = match.lower()
+        tokens.append(token)
+        if "." in token:
+            tokens.extend(part for part in token.split(".") if part)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, ids: list[str], payloads: list[dict], postings: dict[str, list[list[int]]],
+                 doc_lengths: list[int], collection: str, k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.payloads = payloads
+        self.postings = postings
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.collection = collection
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(self.doc_lengths.mean()) if len(doc_lengths) else 0.0
+        n = len(ids)
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+
+    @classmethod
+    def build(cls, ids: list[str], payloads: list[dict], collection: str = COLLECTION) -> "BM25Index":
+        postings: dict[str, list[list[int]]] = {}
+        lengths = []
+        for row, payload in enumerate(payloads):
+            counts = Counter(tokenize(payload.get("page_content", "")))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([row, tf])
+        return cls(ids, payloads, postings, lengths, collection)
+
+    @classmethod
+    def from_qdrant(cls, client: QdrantClient, collection: str = COLLECTION) -> "BM25Index":
+        ids, payloads = [], []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection, limit=1000, offset=offset, with_payload=True, with_vectors=False,
+            )
+            for point in points:
+                ids.append(str(point.id))
+                payloads.append(point.payload or {})
+            if offset is None:
+                break
+        return cls.build(ids, payloads, collection)
+
+    def save(self, path: Path = DEFAULT_PATH):
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "collection": self.collection,
+            "ids": self.ids,
+            "payloads": self.payloads,
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(),
+        }))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_PATH) -> "BM25Index":
+        data = json.loads(path.read_text())
+        return cls(data["ids"], data["payloads"], data["postings"], data["doc_lengths"], data["collection"])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 20) -> list[Document]:
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            rows, tfs = np.asarray(plist, dtype=np.int64).T
+            tfs = tfs.astype(np.float32)
+            scores[rows] += self.idf[term] * tfs * (self.k1 + 1) / (tfs + norm[rows])
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits])[:k]]
+        return [self._document(row, scores[row]) for row in top]
+
+    def _document(self, row: int, score: float) -> Document:
+        payload = self.payloads[row]
+        metadata = dict(payload.get("metadata") or {})
+        metadata["_id"] = self.ids[row]
+        metadata["_collection_name"] = self.collection
+        metadata["_score"] = float(score)
+        return Document(page_content=payload.get("page_content", ""), metadata=metadata)
+
+
+if __name__ == "__main__":
+    index = BM25Index.from_qdrant(QdrantClient(url=QDRANT))
+    index.save()
+    print(f"BM25 index over {len(index)} chunks, {len(index.postings)} terms → {DEFAULT_PATH} ✓")
@@ -1,54 +1,51 @@
-from langchain_community.embeddings import OllamaEmbeddings
+# Run from the repo root:  python -m rag.chat
+#   RAG_RETRIEVER=local python -m rag.chat   → search the in-process snapshot
+import os
+
+from langchain_ollama import OllamaEmbeddings
 from langchain_qdrant import QdrantVectorStore
-from openai import OpenAI
+from llm_gateway import LLMGateway
+
+from . import bm25
+from .context import pack_context
+from .embedding_cache import CachedEmbeddings
+from .hybrid import HybridRetriever
+from .local_index import LocalIndex
+from .prompts import build_messages
 
 
 COLLECTION = "nodejs_pdf"
 QDRANT = "http://localhost:6333"
-
-embedder = OllamaEmbeddings(model="nomic-embed-text")
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
-
-vector_store = QdrantVectorStore.from_existing_collection(
-    collection_name= COLLECTION,
-    url=QDRANT,
-    embedding=embedder
-)
+RETRIEVER = os.getenv("RAG_RETRIEVER", "qdrant")   # "qdrant" | "local"
+MAX_CONTEXT_TOKENS = 1500
+
+embedder = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+llm = LLMGateway(model="gemma2:2b")
+
+if RETRIEVER == "local":
+    local_index = LocalIndex.load()
+    dense_search = lambda query, k: local_index.search(embedder.embed_query(query), k)
+else:
+    vector_store = QdrantVectorStore.from_existing_collection(
+        collection_name= COLLECTION,
+        url=QDRANT,
+        embedding=embedder
+    )
+    dense_search = lambda query, k: vector_store.similarity_search(query=query, k=k)
+
+# Dense + BM25 with reciprocal-rank fusion (dense only if no BM25 index was built)
+keyword_index = bm25.BM25Index.load() if bm25.DEFAULT_PATH.exists() else None
+retriever = HybridRetriever(dense_search, keyword_index)
 
 user_query = input("Ask Something:")
 
 # gives relevant chunks
-search_result= vector_store.similarity_search(query=user_query)
-context_str = "\n".join(
-    [f"File: {doc.metadata.get('source', 'N/A')}, "
-     f"Page: {doc.metadata.get('page', 'N/A')}\n{doc.page_content}"
-     for doc in search_result]
-)
-
-SYSTEM_PROMPT = f"""
-You are a strict technical Q&A assistant that answers from Node.js documentation only.
-
-STRICT RULES:
-1. Use ONLY information from the provided context excerpts
-2. ALWAYS mention the exact page number(s) for every piece of information you use
-3. Use format: [Page X] right after the relevant sentence
-4. If no clear answer exists in context → reply ONLY with:
-   "Information not sufficiently covered in the provided documentation sections."
-
-Example of good answer:
-Node.js allows customizing HTTP requests using various options and callbacks [Page 42].
-The 'request' library provides json parsing support [Pages 38-39].
-
-Context from Node.js documentation:
-{context_str}
-"""
-
-response = client.chat.completions.create(
-    model="gemma2:2b",
-    messages=[
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_query}
-    ]
-)
+search_result, timings = retriever.search(user_query)
+print("Retrieval timings (ms):", {stage: round(ms, 2) for stage, ms in timings.items()})
+# merge overlapping chunks, drop repeats, fit the token budget
+context_str = pack_context(search_result, max_tokens=MAX_CONTEXT_TOKENS)
+
+# static rules first, variable context + question last (reusable prompt prefix)
+response = llm.chat(build_messages(context_str, user_query))
 
 print(response.choices[0].message.content)
\ No newline at end of file
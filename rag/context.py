@@ -0,0 +1,80 @@
+"""
+Context packing for the RAG prompt.
+
+Chunks are split with chunk_overlap=400 on chunk_size=1000, so the top-k
+hits from one page often repeat ~40% of each other. `pack_context()`:
+  1. groups hits by (source, page) and merges chunks whose text overlaps
+     into one excerpt (suffix of one == prefix of the next),
+  2. drops excerpts fully contained in another one,
+  3. fills excerpts, best-ranked page first, up to a token budget,
+and keeps the "File: ..., Page: N" header on every excerpt so the model
+can still cite [Page X].
+"""
+from langchain_core.documents import Document
+
+MAX_CONTEXT_TOKENS = 1500
+CHARS_PER_TOKEN = 4         # rough, good enough for budgeting English docs
+MIN_OVERLAP = 40            # shorter shared spans are treated as coincidence
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    longest = min(len(left), len(right))
+    for size in range(longest, MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _merge_page(texts: list[str]) -> list[str]:
+    """Merge overlapping chunks of one page, drop duplicates/contained ones."""
+    excerpts: list[str] = []
+    for text in texts:
+        text = text.strip()
+        if any(text in existing for existing in excerpts):
+            continue
+        excerpts = [e for e in excerpts if e not in text]
+
+        merged = True
+        while merged:
+            merged = False
+            for i, existing in enumerate(excerpts):
+                if (n := _overlap(existing, text)):
+                    text = existing + text[n:]
+                elif (n := _overlap(text, existing)):
+                    text = text + existing[n:]
+                else:
+                    continue
+                del excerpts[i]
+                merged = True
+                break
+        excerpts.append(text)
+    return excerpts
+
+
+def pack_context(docs: list[Document], max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
+    # Group by page, keeping the page order of the best (first) hit
+    pages: dict[tuple, list[str]] = {}
+    for doc in docs:
+        key = (doc.metadata.get("source", "N/A"), doc.metadata.get("page", "N/A"))
+        pages.setdefault(key, []).append(doc.page_content)
+
+    blocks = []
+    used = 0
+    for (source, page), texts in pages.items():
+        for excerpt in _merge_page(texts):
+            block = f"File: {source}, Page: {page}\n{excerpt}"
+            cost = estimate_tokens(block)
+            if used + cost > max_tokens:
+                remaining = (max_tokens - used) * CHARS_PER_TOKEN
+                # Trim the last excerpt instead of dropping it if a useful part still fits
+                if remaining > 200:
+                    blocks.append(block[:remaining].rsplit(" ", 1)[0] + " …")
+                return "\n\n".join(blocks)
+            blocks.append(block)
+            used += cost
+    return "\n\n".join(blocks)
@@ -0,0 +1,163 @@
+"""
+Disk-backed embedding cache shared by rag/index.py, rag/chat.py and the
+rag_queue worker.
+
+Vectors are stored as float32 blobs in SQLite, keyed by a hash of the
+embedder (class, model, query/document instruction prefixes) + the
+normalized text, so two embedders that feed the model different input
+never share vectors. The table is capped at `max_entries` rows and the least
+recently used rows are evicted first. WAL mode lets the indexer and the
+worker processes use the same file at the same time.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_PATH = Path(os.getenv("RAG_EMBED_CACHE", Path(__file__).parent / ".embedding_cache.sqlite"))
+DEFAULT_MAX_ENTRIES = 200_000
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        inner: Embeddings,
+        model: str | None = None,
+        path: Path = DEFAULT_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.inner = inner
+        self.model = model or getattr(inner, "model", None) or type(inner).__name__
+        # Some embedders (e.g. langchain_community's OllamaEmbeddings) prepend
+        # "passage: " / "query: " before calling the model
+        self.embed_instruction = getattr(inner, "embed_instruction", None) or ""
+        self.query_instruction = getattr(inner, "query_instruction", None) or ""
+        self.namespace = "\0".join([
+            f"{type(inner).__module__}.{type(inner).__qualname__}",
+            self.model,
+            self.embed_instruction,
+            self.query_instruction,
+        ])
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # SQLite handles must not cross fork() (RQ forks a child per job),
+        # so every process opens its own connection on first use.
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+            conn.commit()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    # ── Embeddings interface ───────────────────────────────────────────
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, "doc", self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed([text], "query", lambda batch: [self.inner.embed_query(batch[0])])[0]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Many queries in one embedding call, when the embedder treats queries and documents alike."""
+        if self.query_instruction != self.embed_instruction:
+            return self._embed(texts, "query", lambda batch: [self.inner.embed_query(t) for t in batch])
+        return self._embed(texts, "query", self.inner.embed_documents)
+
+    # ── cache ──────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _key(self, text: str, kind: str) -> str:
+        # kind keeps query/document embeddings apart for models that prefix them differently
+        raw = f"{self.namespace}\0{kind}\0{normalize(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: list[str], kind: str, compute) -> list[list[float]]:
+        keys = [self._key(t, kind) for t in texts]
+        found = self._get_many(keys)
+
+        # Embed each distinct missing text once, even if it repeats in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = compute(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._put_many(fresh)
+            found.update(fresh)
+        return [list(found[key]) for key in keys]
+
+    def _get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in slices
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                self._db.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._db.commit()
+        return found
+
+    def _put_many(self, vectors: dict[str, list[float]]):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vec).tobytes(), now) for key, vec in vectors.items()],
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                # Evict a little extra so we don't run this on every single insert
+                excess = count - self.max_entries + self.max_entries // 20
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+            self._db.commit()
@@ -0,0 +1,89 @@
+"""
+Hybrid retrieval: dense + BM25, fused with reciprocal-rank fusion, then a
+cheap lexical rerank of the top candidates.
+
+Every stage is timed (returned next to the docs, in ms) so the candidate
+count and rerank can be tuned against latency.
+"""
+import re
+import time
+
+from langchain_core.documents import Document
+
+from .bm25 import BM25Index, tokenize
+
+RRF_K = 60              # standard RRF damping constant
+CANDIDATES = 20         # per retriever, before fusion
+
+# Query words that look like code: dotted paths, calls, camelCase
+CODE_RE = re.compile(r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+(?:\(\))?|[a-z]+[A-Z]\w*")
+
+
+def rrf(ranked_lists: list[list[Document]], k: int = RRF_K) -> list[tuple[Document, float]]:
+    """Reciprocal-rank fusion, documents matched by their Qdrant point id."""
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            doc_id = str(doc.metadata.get("_id") or hash(doc.page_content))
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+            docs.setdefault(doc_id, doc)
+    return sorted(((docs[i], s) for i, s in scores.items()), key=lambda pair: -pair[1])
+
+
+def rerank(query: str, fused: list[tuple[Document, float]]) -> list[Document]:
+    """
+    Cheap rerank: fused score (scaled to 0..1) + query-term coverage
+    + a strong boost for code identifiers from the query found verbatim.
+    """
+    if not fused:
+        return []
+    terms = set(tokenize(query))
+    identifiers = [m.rstrip("()") for m in CODE_RE.findall(query)]
+    top = fused[0][1]
+
+    def score(pair):
+        doc, fused_score = pair
+        doc_terms = set(tokenize(doc.page_content))
+        coverage = len(terms & doc_terms) / len(terms) if terms else 0.0
+        exact = sum(1 for ident in identifiers if ident in doc.page_content)
+        return fused_score / top + coverage + 2.0 * exact
+
+    return [doc for doc, _ in sorted(fused, key=score, reverse=True)]
+
+
+class HybridRetriever:
+    def __init__(self, dense_search, bm25: BM25Index | None, k: int = 4,
+                 candidates: int = CANDIDATES, use_rerank: bool = True):
+        """`dense_search(query, k) -> list[Document]`; bm25=None means dense only."""
+        self.dense_search = dense_search
+        self.bm25 = bm25
+        self.k = k
+        self.candidates = candidates
+        self.use_rerank = use_rerank
+
+    def search(self, query: str) -> tuple[list[Document], dict[str, float]]:
+        timings = {}
+        t = time.perf_counter()
+        dense = self.dense_search(query, self.candidates)
+        timings["dense_ms"] = (time.perf_counter() - t) * 1000
+
+        if self.bm25 is None:
+            return dense[:self.k], timings
+
+        t = time.perf_counter()
+        keyword = self.bm25.search(query, self.candidates)
+        timings["bm25_ms"] = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        fused = rrf([dense, keyword])
+        timings["fuse_ms"] = (time.perf_counter() - t) * 1000
+
+        if self.use_rerank:
+            t = time.perf_counter()
+            docs = rerank(query, fused)
+            timings["rerank_ms"] = (time.perf_counter() - t) * 1000
+        else:
+            docs = [doc for doc, _ in fused]
+
+        return docs[:self.k], timings
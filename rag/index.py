@@ -1,33 +1,159 @@
+# Run from the repo root:  python -m rag.index                   (incremental, nodejs.pdf)
+#                          python -m rag.index docs/ 'manuals/**/*.pdf'
+#                          python -m rag.index --full            (drop + rebuild)
+#                          python -m rag.index docs/ --prune     (also drop PDFs not listed)
+import argparse
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_qdrant import QdrantVectorStore
 from langchain_ollama import OllamaEmbeddings
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointIdsList, VectorParams
+from redis import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from . import answer_cache, local_index
+from .bm25 import DEFAULT_PATH as BM25_PATH, BM25Index
+
+from .embedding_cache import CachedEmbeddings
+from .loader import expand_paths, iter_pages, make_tasks, PAGES_PER_TASK
+from .manifest import Manifest, chunk_id
+from .pipeline import EmbedPipeline
 
 # === CONFIG ===
 COLLECTION = "nodejs_pdf"
 QDRANT = "http://localhost:6333"
+REDIS_URL = "redis://localhost:6379/0"   # rag_queue answer cache lives here
+MANIFEST_PATH = Path(__file__).parent / ".index_manifest.json"
+BATCH_SIZE = 64        # chunks per embed call
+EMBED_WORKERS = 4      # concurrent embed calls against Ollama
+DEFAULT_SOURCES = [str(Path(__file__).parent / "nodejs.pdf")]
 # ===============
 
-# 1. Load PDF
-pdf_path = Path(__file__).parent / "nodejs.pdf"
-docs = PyPDFLoader(str(pdf_path)).load()
 
-# 2. Split into chunks
-chunks = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=400
-).split_documents(docs)
+def ensure_collection(client: QdrantClient, embedder, recreate: bool) -> bool:
+    """Create the collection if needed. Returns True when it starts out empty."""
+    if recreate and client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    if client.collection_exists(COLLECTION):
+        return False
+    dim = len(embedder.embed_query("dimension probe"))
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+    )
+    return True
+
+
+def main(
+    sources: list[str] = DEFAULT_SOURCES,
+    full: bool = False,
+    batch_size: int = BATCH_SIZE,
+    workers: int = EMBED_WORKERS,
+    processes: int | None = None,
+    pages_per_task: int = PAGES_PER_TASK,
+    prune: bool = False,
+):
+    # 1. Ollama Nomic embedder (behind the shared disk cache) + Qdrant
+    embedder = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+    client = QdrantClient(url=QDRANT)
+    fresh = ensure_collection(client, embedder, recreate=full)
+
+    # An empty collection means the manifest (if any) is stale → index everything
+    manifest = Manifest(MANIFEST_PATH, COLLECTION) if fresh else Manifest.load(MANIFEST_PATH, COLLECTION)
+
+    # Points but no manifest for them (built by the old indexer, or the manifest
+    # got lost): we can't tell which points are ours → rebuild like --full,
+    # otherwise every chunk would end up in Qdrant twice
+    if not fresh and not manifest.pages and client.count(COLLECTION, exact=True).count:
+        print(f"No manifest for the points in {COLLECTION}, rebuilding it from scratch")
+        ensure_collection(client, embedder, recreate=True)
+        manifest = Manifest(MANIFEST_PATH, COLLECTION)
+
+    # 2. Parse + split PDFs across processes (page ranges), unchanged pages come
+    #    back without chunks; new chunks go straight into the embed pipeline
+    paths = expand_paths(sources)
+    if not paths:
+        print("No PDFs found for", sources)
+        return
+    tasks = make_tasks(paths, pages_per_task)
+    print(f"Indexing {len(paths)} PDF(s) as {len(tasks)} page-range task(s)")
+
+    seen = set()
+    stale_ids = set()
+    unchanged = 0
+
+    with EmbedPipeline(embedder, client, COLLECTION, batch_size=batch_size, workers=workers) as pipeline:
+        for key, page_hash, chunks in iter_pages(tasks, manifest.hashes(), processes=processes):
+            seen.add(key)
+            if chunks is None:
+                unchanged += 1
+                continue
+
+            ids = [chunk_id(key, i, chunk.page_content) for i, chunk in enumerate(chunks)]
+            old_ids = set(manifest.chunk_ids(key))
+            for chunk, cid in zip(chunks, ids):
+                if cid not in old_ids:
+                    pipeline.add(cid, chunk)
+            stale_ids |= old_ids - set(ids)
+            manifest.update_page(key, page_hash, ids)
+
+    # Pages that vanished from a scanned PDF take their chunks with them.
+    # PDFs not part of this run are left alone unless --prune is given.
+    scanned = {str(path) for path in paths}
+    for key in manifest.keys() - seen:
+        if prune or key.rsplit("#", 1)[0] in scanned:
+            stale_ids |= set(manifest.drop_page(key))
+
+    # 3. Drop chunks that no longer exist
+    if stale_ids:
+        client.delete(
+            collection_name=COLLECTION,
+            points_selector=PointIdsList(points=list(stale_ids)),
+        )
+
+    # Only remember the new state once Qdrant has it
+    manifest.save()
+
+    print(f"Pages unchanged: {unchanged}, re-split: {len(seen) - unchanged}")
+    print(f"Stored {pipeline.chunks_done} new chunks, deleted {len(stale_ids)} stale chunks in Qdrant 🚀")
+    print("Embedding cache:", embedder.stats())
+
+    # Keyword index + cached answers were built from the old chunks → refresh
+    if pipeline.chunks_done or stale_ids or not BM25_PATH.exists():
+        keyword_index = BM25Index.from_qdrant(client, COLLECTION)
+        keyword_index.save()
+        print(f"BM25 index rebuilt over {len(keyword_index)} chunks")
 
-# 3. Ollama Nomic embedder
-embedder = OllamaEmbeddings(model="nomic-embed-text")
+    # The RAG_RETRIEVER=local snapshot has to match Qdrant (and the BM25 ids
+    # RRF fuses on), so re-take it if one was ever taken
+    snapshot_dir = local_index.DEFAULT_DIR
+    if (pipeline.chunks_done or stale_ids) and (snapshot_dir / "payloads.json").exists():
+        rows = local_index.snapshot(client, COLLECTION, snapshot_dir)
+        print(f"Local index snapshot refreshed ({rows} chunks)")
 
-vector_store = QdrantVectorStore.from_documents(
-    documents=chunks,
-    embedding=embedder,
-    url=QDRANT,
-    collection_name=COLLECTION
-)
+    if pipeline.chunks_done or stale_ids:
+        try:
+            answer_cache.invalidate(Redis.from_url(REDIS_URL), COLLECTION)
+            print("Answer cache invalidated")
+        except RedisConnectionError:
+            print("Redis not reachable, answer cache not invalidated")
 
 
-print(f"Stored {len(chunks)} chunks in Qdrant 🚀")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index PDFs into Qdrant")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="PDF files, directories or glob patterns")
+    parser.add_argument("--full", action="store_true", help="drop the collection and re-embed everything")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="chunks per embed call")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="concurrent embed calls")
+    parser.add_argument("--procs", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--pages-per-task", type=int, default=PAGES_PER_TASK, help="pages parsed per process task")
+    parser.add_argument("--prune", action="store_true", help="delete chunks of indexed PDFs not in this run's sources")
+    args = parser.parse_args()
+    main(
+        sources=args.sources,
+        full=args.full,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        processes=args.procs,
+        pages_per_task=args.pages_per_task,
+        prune=args.prune,
+    )
@@ -0,0 +1,109 @@
+"""
+Parallel PDF loading + splitting for rag/index.py.
+
+Each PDF is cut into page ranges and every range is parsed and split in a
+separate process (pypdf text extraction is CPU bound). Results are yielded
+back in (file, page) order no matter which process finishes first, so the
+chunk ids derived from them are the same on every run.
+"""
+import glob
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from .manifest import content_hash, page_key
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 400
+PAGES_PER_TASK = 32
+
+# Set once per worker process by _init_worker
+_splitter = None
+
+
+def expand_paths(patterns: list[str]) -> list[Path]:
+    """Files, directories (searched recursively for *.pdf) or glob patterns → sorted unique PDFs."""
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found.update(path.rglob("*.pdf"))
+        elif any(ch in pattern for ch in "*?["):
+            found.update(Path(p) for p in glob.glob(pattern, recursive=True))
+        else:
+            found.add(path)
+    return sorted(p.resolve() for p in found)
+
+
+def make_tasks(paths: list[Path], pages_per_task: int = PAGES_PER_TASK) -> list[tuple[str, int, int]]:
+    """One (file, start_page, stop_page) task per page range, in file/page order."""
+    tasks = []
+    for path in paths:
+        total = len(PdfReader(str(path)).pages)
+        for start in range(0, total, pages_per_task):
+            tasks.append((str(path), start, min(start + pages_per_task, total)))
+    return tasks
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int):
+    global _splitter
+    _splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def load_range(task: tuple[str, int, int], known_hashes: dict[str, str]) -> list[tuple[str, str, list[Document] | None]]:
+    """
+    Parse + split one page range.
+
+    Returns (page_key, page_hash, chunks) per page; chunks is None when the
+    page hash matches `known_hashes`, so unchanged pages aren't split or
+    shipped back to the parent process.
+    """
+    source, start, stop = task
+    reader = PdfReader(source)
+    total = len(reader.pages)
+    labels = reader.page_labels
+    out = []
+    for i in range(start, stop):
+        text = reader.pages[i].extract_text()
+        key = page_key(source, i)
+        page_hash = content_hash(text)
+        if known_hashes.get(key) == page_hash:
+            out.append((key, page_hash, None))
+            continue
+        page = Document(
+            page_content=text,
+            metadata={"source": source, "total_pages": total, "page": i, "page_label": labels[i]},
+        )
+        out.append((key, page_hash, _splitter.split_documents([page])))
+    return out
+
+
+def iter_pages(tasks, known_hashes: dict[str, str], processes: int | None = None,
+               chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    """
+    Yield (page_key, page_hash, chunks) for every page, in task order.
+
+    Only ~2 tasks per process are in flight at once, so a slow consumer
+    (the embed pipeline) naturally throttles the parsers.
+    """
+    processes = processes or os.cpu_count() or 1
+    max_in_flight = processes * 2
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(chunk_size, chunk_overlap),
+    ) as pool:
+        pending = deque()
+        for task in tasks:
+            source, start, stop = task
+            hashes = {k: known_hashes[k] for k in (page_key(source, i) for i in range(start, stop)) if k in known_hashes}
+            pending.append(pool.submit(load_range, task, hashes))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,162 @@
+"""
+In-process vector index over a snapshot of a Qdrant collection.
+
+`snapshot()` scrolls every point out of Qdrant and writes:
+  vectors.npy    float32, L2-normalized rows (memory-mapped on load)
+  payloads.json  page_content + metadata per row
+  ivf.npz        (large collections only) k-means centroids + row offsets
+
+Collections up to BRUTE_FORCE_MAX rows are searched exactly with one NumPy
+matmul. Bigger ones use an IVF index: rows are grouped by nearest centroid
+and only the `nprobe` closest groups are scanned.
+
+Search results are LangChain Documents with the same metadata (incl. page)
+that QdrantVectorStore returns, so the prompt builder doesn't care which
+backend produced them.
+
+    python -m rag.local_index              # snapshot the default collection
+"""
+import argparse
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+COLLECTION = "nodejs_pdf"
+QDRANT = "http://localhost:6333"
+DEFAULT_DIR = Path(__file__).parent / ".local_index"
+BRUTE_FORCE_MAX = 20_000
+NPROBE = 8
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _kmeans(data: np.ndarray, n_clusters: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine), trained on a sample to keep it quick."""
+    rng = np.random.default_rng(seed)
+    sample = data[rng.choice(len(data), size=min(len(data), n_clusters * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+def snapshot(client: QdrantClient, collection: str = COLLECTION, out_dir: Path = DEFAULT_DIR) -> int:
+    """Dump the collection to `out_dir` and build the ANN structure. Returns row count."""
+    ids, vectors, payloads = [], [], []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=1000,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        for point in points:
+            ids.append(str(point.id))
+            vectors.append(point.vector)
+            payloads.append(point.payload or {})
+        if offset is None:
+            break
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+    ivf = out_dir / "ivf.npz"
+
+    if len(matrix) > BRUTE_FORCE_MAX:
+        # Reorder rows so every IVF list is one contiguous slice of the matrix
+        centroids = _kmeans(matrix, n_clusters=int(math.sqrt(len(matrix))))
+        assign = np.argmax(matrix @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        matrix, assign = matrix[order], assign[order]
+        ids = [ids[i] for i in order]
+        payloads = [payloads[i] for i in order]
+        offsets = np.searchsorted(assign, np.arange(len(centroids) + 1))
+        np.savez(ivf, centroids=centroids, offsets=offsets)
+    elif ivf.exists():
+        ivf.unlink()
+
+    np.save(out_dir / "vectors.npy", matrix)
+    (out_dir / "payloads.json").write_text(json.dumps({"collection": collection, "ids": ids, "payloads": payloads}))
+    return len(matrix)
+
+
+class LocalIndex:
+    def __init__(self, vectors: np.ndarray, ids: list[str], payloads: list[dict], collection: str,
+                 centroids: np.ndarray | None = None, offsets: np.ndarray | None = None, nprobe: int = NPROBE):
+        self.vectors = vectors
+        self.ids = ids
+        self.payloads = payloads
+        self.collection = collection
+        self.centroids = centroids
+        self.offsets = offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_DIR, nprobe: int = NPROBE) -> "LocalIndex":
+        meta = json.loads((path / "payloads.json").read_text())
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        centroids = offsets = None
+        if (path / "ivf.npz").exists():
+            ivf = np.load(path / "ivf.npz")
+            centroids, offsets = ivf["centroids"], ivf["offsets"]
+        return cls(vectors, meta["ids"], meta["payloads"], meta["collection"], centroids, offsets, nprobe)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, vector, k: int = 4) -> list[Document]:
+        return self.search_batch([vector], [k])[0]
+
+    def search_batch(self, vectors, ks: list[int]) -> list[list[Document]]:
+        queries = _normalize(np.asarray(vectors, dtype=np.float32))
+        return [
+            [self._document(row, score) for row, score in zip(*self._top_k(query, k))]
+            for query, k in zip(queries, ks)
+        ]
+
+    def _top_k(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if self.centroids is None:
+            rows = None
+            scores = self.vectors @ query
+        else:
+            probe = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probe])
+            scores = self.vectors[rows] @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return np.array([], dtype=int), np.array([], dtype=np.float32)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return (best if rows is None else rows[best]), scores[best]
+
+    def _document(self, row: int, score: float) -> Document:
+        payload = self.payloads[row]
+        metadata = dict(payload.get("metadata") or {})
+        # Same extra keys QdrantVectorStore adds
+        metadata["_id"] = self.ids[row]
+        metadata["_collection_name"] = self.collection
+        metadata["_score"] = float(score)
+        return Document(page_content=payload.get("page_content", ""), metadata=metadata)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot a Qdrant collection into a local index")
+    parser.add_argument("--collection", default=COLLECTION)
+    parser.add_argument("--out", type=Path, default=DEFAULT_DIR)
+    args = parser.parse_args()
+    n = snapshot(QdrantClient(url=QDRANT), args.collection, args.out)
+    print(f"Snapshot of {n} vectors written to {args.out} ✓")
@@ -0,0 +1,72 @@
+"""
+Local manifest of what rag/index.py has already pushed to Qdrant.
+
+Every page is tracked by a hash of its text and every chunk gets a stable
+point id derived from its content, so re-running the indexer only embeds
+chunks that are new or changed and deletes the ones that disappeared.
+"""
+import hashlib
+import json
+import uuid
+from pathlib import Path
+
+# Fixed namespace → the same chunk always maps to the same Qdrant point id
+POINT_NAMESPACE = uuid.UUID("6f1c1f3e-5a52-4c1b-9a57-2f0d7c1e9b10")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def page_key(source: str, page: int) -> str:
+    return f"{source}#{page}"
+
+
+def chunk_id(key: str, index: int, text: str) -> str:
+    # index is part of the id so two identical chunks on one page don't collide
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{key}#{index}#{content_hash(text)}"))
+
+
+class Manifest:
+    def __init__(self, path: Path, collection: str):
+        self.path = path
+        self.collection = collection
+        # page_key -> {"hash": page hash, "chunks": [point ids]}
+        self.pages: dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Path, collection: str) -> "Manifest":
+        manifest = cls(path, collection)
+        if path.exists():
+            data = json.loads(path.read_text())
+            # A manifest written for another collection says nothing about this one
+            if data.get("collection") == collection:
+                manifest.pages = data.get("pages", {})
+        return manifest
+
+    def keys(self) -> set[str]:
+        return set(self.pages)
+
+    def hashes(self) -> dict[str, str]:
+        return {key: entry["hash"] for key, entry in self.pages.items()}
+
+    def page_hash(self, key: str) -> str | None:
+        entry = self.pages.get(key)
+        return entry["hash"] if entry else None
+
+    def chunk_ids(self, key: str) -> list[str]:
+        entry = self.pages.get(key)
+        return list(entry["chunks"]) if entry else []
+
+    def update_page(self, key: str, page_hash: str, ids: list[str]):
+        self.pages[key] = {"hash": page_hash, "chunks": ids}
+
+    def drop_page(self, key: str) -> list[str]:
+        entry = self.pages.pop(key, None)
+        return list(entry["chunks"]) if entry else []
+
+    def save(self):
+        # Write to a temp file first so a crash never leaves a half-written manifest
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"collection": self.collection, "pages": self.pages}, indent=1))
+        tmp.replace(self.path)
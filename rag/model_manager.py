@@ -0,0 +1,61 @@
+"""
+Keeps an Ollama model loaded so it never cold-loads in the middle of traffic.
+
+- preload(): load the model with a long keep_alive (native /api/generate)
+- warm_up(): one tiny chat request with the static system prompt, so the
+  first real request already finds that prefix in the KV cache
+- start_keepalive(): background refresh. Requests through the OpenAI
+  compatible endpoint reset the model's expiry to the server default
+  (OLLAMA_KEEP_ALIVE, 5m), so we re-extend it periodically.
+"""
+import threading
+
+import httpx
+
+OLLAMA = "http://localhost:11434"
+KEEP_ALIVE = "30m"
+REFRESH_SECONDS = 120
+
+
+class ModelManager:
+    def __init__(self, model: str, base_url: str = OLLAMA, keep_alive: str = KEEP_ALIVE):
+        self.model = model
+        self.keep_alive = keep_alive
+        self._http = httpx.Client(base_url=base_url, timeout=httpx.Timeout(10.0, read=300.0))
+        self._stop = threading.Event()
+
+    def preload(self):
+        # No prompt → Ollama just loads the model and applies keep_alive
+        self._http.post("/api/generate", json={"model": self.model, "keep_alive": self.keep_alive}).raise_for_status()
+
+    def warm_up(self, system_prompt: str):
+        response = self._http.post("/api/chat", json={
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": "ok"},
+            ],
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {"num_predict": 1},
+        })
+        response.raise_for_status()
+        data = response.json()
+        # Ollama reports durations in nanoseconds
+        print(
+            f"{self.model} warm: load {data.get('load_duration', 0) / 1e6:.0f} ms, "
+            f"prefill {data.get('prompt_eval_duration', 0) / 1e6:.0f} ms"
+        )
+
+    def start_keepalive(self, interval: float = REFRESH_SECONDS):
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.preload()
+                except httpx.HTTPError as e:
+                    print("Model keep-alive failed:", e)
+
+        threading.Thread(target=loop, name="model-keepalive", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
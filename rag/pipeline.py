@@ -0,0 +1,111 @@
+"""
+Streaming embed → upsert pipeline used by rag/index.py.
+
+Chunks are pushed in one at a time, grouped into batches and embedded by a
+small thread pool. At most `max_pending` batches are in flight; once that
+limit is hit `add()` blocks until the oldest batch lands in Qdrant, so
+memory stays flat no matter how big the corpus is.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+
+class EmbedPipeline:
+    def __init__(
+        self,
+        embedder,
+        client: QdrantClient,
+        collection: str,
+        batch_size: int = 64,
+        workers: int = 4,
+        max_pending: int | None = None,
+        verbose: bool = True,
+    ):
+        self.embedder = embedder
+        self.client = client
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_pending = max_pending or workers * 2
+        self.verbose = verbose
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed")
+        self._pending: deque[Future] = deque()
+        self._buffer: list[tuple[str, object]] = []
+        self._lock = threading.Lock()
+        self._batches = 0
+        self.chunks_done = 0
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+        self._started = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Don't start new work on failure, just let running batches finish
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def add(self, point_id: str, doc):
+        self._buffer.append((point_id, doc))
+        if len(self._buffer) >= self.batch_size:
+            self._dispatch()
+
+    def close(self):
+        if self._buffer:
+            self._dispatch()
+        while self._pending:
+            self._pending.popleft().result()
+        self._pool.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - self._started
+        if self.verbose and self.chunks_done:
+            print(
+                f"Embedded {self.chunks_done} chunks in {self._batches} batches, "
+                f"{elapsed:.1f}s total ({self.chunks_done / elapsed:.1f} chunks/s), "
+                f"embed {self.embed_seconds:.1f}s, upsert {self.upsert_seconds:.1f}s"
+            )
+
+    def _dispatch(self):
+        batch, self._buffer = self._buffer, []
+        # Backpressure: wait for the oldest batch before queueing another one.
+        # .result() also re-raises any embedding/upsert error right here.
+        while len(self._pending) >= self.max_pending:
+            self._pending.popleft().result()
+        self._pending.append(self._pool.submit(self._run_batch, batch))
+
+    def _run_batch(self, batch: list[tuple[str, object]]):
+        t0 = time.perf_counter()
+        vectors = self.embedder.embed_documents([doc.page_content for _, doc in batch])
+        t1 = time.perf_counter()
+        # Same payload layout langchain_qdrant writes, so QdrantVectorStore can read it back
+        points = [
+            PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={"page_content": doc.page_content, "metadata": doc.metadata},
+            )
+            for (point_id, doc), vector in zip(batch, vectors)
+        ]
+        self.client.upsert(collection_name=self.collection, points=points, wait=True)
+        t2 = time.perf_counter()
+
+        with self._lock:
+            self._batches += 1
+            self.chunks_done += len(batch)
+            self.embed_seconds += t1 - t0
+            self.upsert_seconds += t2 - t1
+            rate = self.chunks_done / (t2 - self._started)
+            n = self._batches
+        if self.verbose:
+            print(
+                f"  batch {n}: {len(batch)} chunks, embed {(t1 - t0) * 1000:.0f} ms, "
+                f"upsert {(t2 - t1) * 1000:.0f} ms, {rate:.1f} chunks/s"
+            )
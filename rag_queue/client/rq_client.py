@@ -1,7 +1,27 @@
 
 from rq import Queue
 from redis import Redis
+from redis.asyncio import ConnectionPool as AsyncConnectionPool, Redis as AsyncRedis
 
 conn = Redis(host="localhost", port=6379, db=0)
 queue = Queue(connection=conn)
 
+# /chat priority → RQ queue. Workers listen to these in this order, so a
+# queued high-priority job is always dequeued before default/low ones.
+priority_queues = [
+    Queue("high", connection=conn),
+    queue,
+    Queue("low", connection=conn),
+]
+
+
+def queue_for(priority: int) -> Queue:
+    """Lower priority value runs first, same as the generation scheduler."""
+    if priority < 0:
+        return priority_queues[0]
+    return queue if priority == 0 else priority_queues[2]
+
+# Shared async pool for the FastAPI app: status lookups and token streams
+# never block the event loop and reuse a bounded set of connections
+async_pool = AsyncConnectionPool(host="localhost", port=6379, db=0, max_connections=64)
+async_conn = AsyncRedis(connection_pool=async_pool)
@@ -0,0 +1,58 @@
+"""
+Per-job token streams in Redis/Valkey.
+
+The worker appends generated tokens to a Redis stream named after the RQ
+job id; the FastAPI app reads that stream and relays it to the client as
+Server-Sent Events. Streams are kept for STREAM_TTL seconds so a client
+that connects late still gets every token from the start. The TTL is set
+(and renewed) with every write, so the stream of a crashed job expires too.
+"""
+import time
+
+from redis import Redis
+
+STREAM_TTL = 10 * 60          # seconds a stream stays readable after its last write
+FLUSH_CHARS = 24              # coalesce tiny tokens into fewer XADDs...
+FLUSH_SECONDS = 0.05          # ...but never hold them back longer than this
+
+
+def stream_key(job_id: str) -> str:
+    return f"rag:tokens:{job_id}"
+
+
+class TokenPublisher:
+    def __init__(self, conn: Redis, job_id: str):
+        self.conn = conn
+        self.key = stream_key(job_id)
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def token(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= FLUSH_CHARS or time.monotonic() - self._last_flush >= FLUSH_SECONDS:
+            self._flush()
+
+    def done(self, answer: str):
+        self._flush()
+        self._close("done", answer)
+
+    def error(self, message: str):
+        self._flush()
+        self._close("error", message)
+
+    def _flush(self):
+        if self._buffer:
+            pipe = self.conn.pipeline(transaction=False)
+            pipe.xadd(self.key, {"type": "token", "data": "".join(self._buffer)})
+            pipe.expire(self.key, STREAM_TTL)
+            pipe.execute()
+            self._buffer, self._buffered = [], 0
+        self._last_flush = time.monotonic()
+
+    def _close(self, event: str, data: str):
+        pipe = self.conn.pipeline(transaction=False)
+        pipe.xadd(self.key, {"type": event, "data": data})
+        pipe.expire(self.key, STREAM_TTL)
+        pipe.execute()
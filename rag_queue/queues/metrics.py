@@ -0,0 +1,37 @@
+"""
+Worker → API metrics hand-off.
+
+Each warm worker process periodically writes its stats (scheduler queue
+depth, batch sizes, cache hit rates...) as JSON into one Redis hash, keyed
+by host:pid. The API's /metrics endpoint just reads that hash back.
+"""
+import json
+import os
+import socket
+import threading
+
+METRICS_KEY = "rag:metrics"
+METRICS_TTL = 60          # the hash disappears when no worker reports anymore
+
+
+def start_reporter(conn, collect, interval: float = 5.0):
+    """Background thread that publishes `collect()` every `interval` seconds."""
+    field = f"{socket.gethostname()}:{os.getpid()}"
+
+    def loop():
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                pipe = conn.pipeline(transaction=False)
+                pipe.hset(METRICS_KEY, field, json.dumps(collect()))
+                pipe.expire(METRICS_KEY, METRICS_TTL)
+                pipe.execute()
+            except Exception as e:
+                print("Metrics report failed:", e)
+
+    threading.Thread(target=loop, name="metrics-reporter", daemon=True).start()
+
+
+async def read_metrics(async_conn) -> dict:
+    raw = await async_conn.hgetall(METRICS_KEY)
+    return {field.decode(): json.loads(value) for field, value in raw.items()}
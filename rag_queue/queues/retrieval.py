@@ -0,0 +1,103 @@
+"""
+Batched retrieval for the RAG worker.
+
+Concurrent jobs call `BatchRetriever.search()` from their own threads. The
+queries that pile up within a few milliseconds are embedded in one call
+and sent to the backend as one batch search; each job then gets its own
+top-k back as LangChain Documents (same shape similarity_search returns).
+
+Backends implement `search_batch(vectors, ks) -> list[list[Document]]`:
+QdrantBackend below (one query_batch_points round-trip) or
+rag.local_index.LocalIndex (in-process, no network at all).
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from qdrant_client.models import QueryRequest
+
+BATCH_WINDOW = 0.005    # seconds to wait for more queries
+MAX_BATCH = 32
+
+
+class MicroBatcher:
+    """Collects items from many threads and hands them to `handler` as one list."""
+
+    def __init__(self, handler, window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._items: list[tuple[object, Future]] = []
+        self._cv = threading.Condition()
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        with self._cv:
+            self._items.append((item, future))
+            self._cv.notify()
+        return future
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._items:
+                    self._cv.wait()
+            time.sleep(self.window)
+            with self._cv:
+                batch, self._items = self._items[:self.max_batch], self._items[self.max_batch:]
+            try:
+                results = self.handler([item for item, _ in batch])
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+class QdrantBackend:
+    def __init__(self, client: QdrantClient, collection: str):
+        self.client = client
+        self.collection = collection
+
+    def search_batch(self, vectors, ks: list[int]) -> list[list[Document]]:
+        responses = self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=[
+                QueryRequest(query=vector, limit=k, with_payload=True)
+                for vector, k in zip(vectors, ks)
+            ],
+        )
+        return [
+            [
+                Document(
+                    page_content=point.payload.get("page_content", ""),
+                    metadata={
+                        **(point.payload.get("metadata") or {}),
+                        "_id": str(point.id),
+                        "_collection_name": self.collection,
+                        "_score": point.score,
+                    },
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+
+class BatchRetriever:
+    def __init__(self, embedder, backend, k: int = 4):
+        self.embedder = embedder
+        self.backend = backend
+        self.k = k
+        self._batcher = MicroBatcher(self._search_batch)
+
+    def search(self, query: str, k: int | None = None) -> list[Document]:
+        return self._batcher.submit((query, k or self.k)).result()
+
+    def _search_batch(self, items: list[tuple[str, int]]) -> list[list[Document]]:
+        vectors = self.embedder.embed_queries([query for query, _ in items])
+        return self.backend.search_batch(vectors, [k for _, k in items])
@@ -0,0 +1,111 @@
+"""
+Generation scheduler for the RAG worker.
+
+Jobs running in the worker threads hand their LLM call to the scheduler
+instead of hitting Ollama directly. The scheduler waits a few milliseconds
+to collect requests that arrive together, then dispatches them with at
+most `parallel` calls in flight (match Ollama's OLLAMA_NUM_PARALLEL so
+requests get batched by the server instead of queueing behind each other).
+
+Which request goes next: lowest `priority` value first, and between equal
+priorities users take turns, so one chatty user can't starve the others.
+A user's own requests are kept in a heap, so their urgent request never
+waits behind their earlier low-priority ones.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+BATCH_WINDOW = 0.02     # seconds to wait for more requests before dispatching
+
+
+class GenerationScheduler:
+    def __init__(self, parallel: int = NUM_PARALLEL, window: float = BATCH_WINDOW):
+        self.parallel = parallel
+        self.window = window
+
+        self._pool = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="generate")
+        self._cv = threading.Condition()
+        # user -> heap of (priority, seq, fn, future); order = round-robin turn
+        self._users: OrderedDict[str, list] = OrderedDict()
+        self._seq = itertools.count()
+        self._depth = 0
+        self._in_flight = 0
+
+        self._batches = 0
+        self._dispatched = 0
+        self._max_batch = 0
+        self._max_depth = 0
+
+        threading.Thread(target=self._dispatch_loop, name="generation-scheduler", daemon=True).start()
+
+    def submit(self, fn, user: str = "anonymous", priority: int = 0) -> Future:
+        future = Future()
+        with self._cv:
+            heapq.heappush(self._users.setdefault(user, []), (priority, next(self._seq), fn, future))
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+            self._cv.notify()
+        return future
+
+    def run(self, fn, user: str = "anonymous", priority: int = 0):
+        """Submit and wait, for callers that are already on their own thread."""
+        return self.submit(fn, user, priority).result()
+
+    def metrics(self) -> dict:
+        with self._cv:
+            return {
+                "queue_depth": self._depth,
+                "max_queue_depth": self._max_depth,
+                "in_flight": self._in_flight,
+                "batches": self._batches,
+                "avg_batch_size": self._dispatched / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+            }
+
+    def _pick(self):
+        # Best priority over every pending request wins; among equals the
+        # user earliest in turn order, and within a user the oldest request
+        user = min(self._users, key=lambda u: self._users[u][0][0])
+        pending = self._users[user]
+        item = heapq.heappop(pending)
+        if pending:
+            self._users.move_to_end(user)
+        else:
+            del self._users[user]
+        self._depth -= 1
+        return item
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cv:
+                while not self._depth or self._in_flight >= self.parallel:
+                    self._cv.wait()
+            # Let requests arriving at the same moment join this batch
+            time.sleep(self.window)
+            with self._cv:
+                batch = []
+                while self._depth and self._in_flight < self.parallel:
+                    batch.append(self._pick())
+                    self._in_flight += 1
+                self._batches += 1
+                self._dispatched += len(batch)
+                self._max_batch = max(self._max_batch, len(batch))
+            for _, _, fn, future in batch:
+                self._pool.submit(self._run, fn, future)
+
+    def _run(self, fn, future: Future):
+        try:
+            if future.set_running_or_notify_cancel():
+                future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._cv:
+                self._in_flight -= 1
+                self._cv.notify()
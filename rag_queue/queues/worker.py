@@ -1,51 +1,139 @@
-from langchain_community.embeddings import OllamaEmbeddings
+import os
+
+from langchain_ollama import OllamaEmbeddings
 from langchain_qdrant import QdrantVectorStore
-from openai import OpenAI
+from llm_gateway import LLMGateway
+from rq import get_current_job
+
+from rag.answer_cache import AnswerCache
+from rag import bm25
+from rag.context import estimate_tokens, pack_context
+from rag.embedding_cache import CachedEmbeddings
+from rag.hybrid import HybridRetriever
+from rag.local_index import LocalIndex
+from rag.model_manager import ModelManager
+from rag.prompts import SYSTEM_PROMPT, build_messages
+from ..client.rq_client import conn
+from ..client.token_stream import TokenPublisher
+from .retrieval import BatchRetriever, QdrantBackend
+from .scheduler import GenerationScheduler
 
 COLLECTION = "nodejs_pdf"
 QDRANT = "http://localhost:6333"
+LLM_MODEL = "gemma2:2b"
+# "qdrant" or "local" (in-process snapshot, build it with: python -m rag.local_index)
+RETRIEVER = os.getenv("RAG_RETRIEVER", "qdrant")
+MAX_CONTEXT_TOKENS = 1500    # prompt budget for retrieved excerpts
+HTTP_POOL_SIZE = 16         # keep-alive connections to Ollama's OpenAI endpoint (llm_gateway.py)
+
+# Semantic answer cache: reuse answers for (near-)identical questions
+ANSWER_SIMILARITY = 0.95    # cosine threshold for a semantic hit
+ANSWER_TTL = 60 * 60        # seconds
+ANSWER_MAX_ENTRIES = 1000
 
-embedder = OllamaEmbeddings(model="nomic-embed-text")
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
+# Everything below is built once per worker process and reused across jobs.
+# langchain_ollama's embedder talks to Ollama over a pooled httpx client
+# (the langchain_community one opened a new connection per request).
+# Repeated questions skip the Ollama embedding round-trip entirely.
+embedder = CachedEmbeddings(OllamaEmbeddings(model="nomic-embed-text"))
+llm = LLMGateway(model=LLM_MODEL, pool_size=HTTP_POOL_SIZE)
+
+# Queries from concurrent jobs are embedded + searched in batches.
+# The local backend never talks to Qdrant, so don't connect to it at all.
+if RETRIEVER == "local":
+    backend = LocalIndex.load()
+    print(f"Local retriever loaded: {len(backend)} vectors")
+else:
+    vector_store = QdrantVectorStore.from_existing_collection(
+        collection_name= COLLECTION,
+        url=QDRANT,
+        embedding=embedder
+    )
+    backend = QdrantBackend(vector_store.client, COLLECTION)
+retriever = BatchRetriever(embedder, backend)
 
-vector_store = QdrantVectorStore.from_existing_collection(
-    collection_name= COLLECTION,
-    url=QDRANT,
-    embedding=embedder
+# Dense + BM25 (exact API names) fused with RRF, then a cheap rerank.
+# Without a BM25 index (python -m rag.bm25) this is plain dense search.
+keyword_index = bm25.BM25Index.load() if bm25.DEFAULT_PATH.exists() else None
+hybrid = HybridRetriever(retriever.search, keyword_index)
+
+# All LLM calls in this process go through one scheduler (bounded parallelism,
+# per-user fairness), see scheduler.py
+scheduler = GenerationScheduler()
+
+answer_cache = AnswerCache(
+    conn,
+    embedder,
+    collection=COLLECTION,
+    model=LLM_MODEL,
+    threshold=ANSWER_SIMILARITY,
+    ttl=ANSWER_TTL,
+    max_entries=ANSWER_MAX_ENTRIES,
 )
 
-def process_query(query: str):
+model_manager = ModelManager(LLM_MODEL)
+
+def warm_up():
+    """Open the Ollama (+ Qdrant) connections and load the model before the first job arrives."""
+    embedder.embed_query("warm up")
+    if RETRIEVER != "local":
+        vector_store.client.get_collection(COLLECTION)
+    llm.client.models.list()
+    model_manager.preload()
+    model_manager.warm_up(SYSTEM_PROMPT)
+    model_manager.start_keepalive()
+
+
+def process_query(query: str, user_id: str = "anonymous", priority: int = 0):
+    # Tokens are streamed to Redis so /chat/stream can relay them live
+    job = get_current_job()
+    publisher = TokenPublisher(conn, job.id) if job else None
+    try:
+        answer = _answer(query, publisher, user_id, priority)
+    except Exception as e:
+        if publisher:
+            publisher.error(str(e))
+        raise
+    if publisher:
+        publisher.done(answer)
+    return answer
+
+
+def _answer(query: str, publisher: TokenPublisher | None, user_id: str, priority: int) -> str:
+    cached = answer_cache.lookup(query)
+    if cached is not None:
+        print("Answer cache hit", query)
+        return cached
+
     print("Searching Chunks", query)
-    search_result = vector_store.similarity_search(query)
-    context_str = "\n".join(
-        [
-            f"File: {doc.metadata.get('source', 'N/A')}, "
-            f"Page: {doc.metadata.get('page', 'N/A')}\n{doc.page_content}"
-            for doc in search_result
-        ]
-    )
-    SYSTEM_PROMPT = f"""
-        You are a strict technical Q&A assistant that answers from Node.js documentation only.
-
-        STRICT RULES:
-        1. Use ONLY information from the provided context excerpts
-        2. ALWAYS mention the exact page number(s) for every piece of information you use
-        3. Use format: [Page X] right after the relevant sentence
-        4. If no clear answer exists in context → reply ONLY with:
-        "Information not sufficiently covered in the provided documentation sections."
-
-        Example of good answer:
-        Node.js allows customizing HTTP requests using various options and callbacks [Page 42].
-        The 'request' library provides json parsing support [Pages 38-39].
-
-        Context from Node.js documentation:
-        {context_str}
-        """
-    response = client.chat.completions.create(
-    model="gemma2:2b",
-    messages=[
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": query}
-    ])
-    print(response.choices[0].message.content)
-    return response.choices[0].message.content
\ No newline at end of file
+    search_result, timings = hybrid.search(query)
+    print("Retrieval timings (ms):", {stage: round(ms, 2) for stage, ms in timings.items()})
+    print("Embedding cache:", embedder.stats())
+    # Merge overlapping chunks of a page, drop repeats, fit the token budget
+    context_str = pack_context(search_result, max_tokens=MAX_CONTEXT_TOKENS)
+    raw_tokens = sum(estimate_tokens(doc.page_content) for doc in search_result)
+    print(f"Context ~{estimate_tokens(context_str)} tokens (raw chunks ~{raw_tokens})")
+    # Static instructions first (shared KV-cache prefix), context + question last
+    messages = build_messages(context_str, query)
+
+    def generate() -> str:
+        stream = llm.stream(messages)
+        parts = []
+        for delta in stream:
+            parts.append(delta)
+            if publisher:
+                publisher.token(delta)
+
+        # Time to first token ≈ prefill, the rest is decode
+        if stream.ttft is not None:
+            usage = stream.usage
+            decode = stream.elapsed - stream.ttft
+            rate = f", {usage.completion_tokens / decode:.1f} tok/s" if usage and decode > 0 else ""
+            prompt = f", prompt {usage.prompt_tokens} tokens" if usage else ""
+            print(f"prefill {stream.ttft * 1000:.0f} ms, decode {decode * 1000:.0f} ms{rate}{prompt}")
+        return "".join(parts)
+
+    answer = scheduler.run(generate, user=user_id, priority=priority)
+    print(answer)
+    answer_cache.store(query, answer)
+    return answer
\ No newline at end of file
@@ -1,24 +1,139 @@
-from fastapi import FastAPI, Query
-from .client.rq_client import queue
-from .queues.worker import process_query
+import asyncio
+import json
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from rq.job import Job
+from rq.results import Result
+from .client.rq_client import async_conn, async_pool, conn, queue, queue_for
+from .client.token_stream import stream_key
+from .queues.metrics import read_metrics
+
+# Enqueued by import path so the API process never builds the worker's
+# Ollama / Qdrant clients
+PROCESS_QUERY = "rag_queue.queues.worker.process_query"
+MAX_BATCH = 500
+STREAM_BLOCK_MS = 15000     # XREAD block before a keep-alive + job status check
+
+# RQ's detailed statuses collapsed into what clients care about
+JOB_STATES = {
+    "queued": "queued",
+    "deferred": "queued",
+    "scheduled": "queued",
+    "started": "started",
+    "finished": "finished",
+    "failed": "failed",
+    "stopped": "failed",
+    "canceled": "failed",
+}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await async_pool.disconnect()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get('/')
-def root():
+async def root():
     return {"status":"server is up and running"}
 
 @app.post('/chat')
-def chat(
-    query:str = Query(..., description="The Chat query of user")
+async def chat(
+    query:str = Query(..., description="The Chat query of user"),
+    user_id: str = Query("anonymous", description="Used for fair scheduling between users"),
+    priority: int = Query(0, description="Lower runs first (<0 high, 0 default, >0 low queue)"),
 ):
-    job = queue.enqueue(process_query,query)
-    return {"status":"queued", "job_id": job.id}
-    
+    # RQ's enqueue is sync, keep it off the event loop
+    job = await asyncio.to_thread(queue_for(priority).enqueue, PROCESS_QUERY, query, user_id, priority)
+    return {"status":"queued", "job_id": job.id, "stream": f"/chat/stream/{job.id}"}
+
+async def fetch_statuses(job_ids: list[str]) -> list[dict]:
+    """Status + result for many jobs in a single pipelined round-trip."""
+    async with async_conn.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hget(Job.key_for(job_id), "status")
+            pipe.xrevrange(Result.get_key(job_id), count=1)
+        replies = await pipe.execute()
+
+    statuses = []
+    for i, job_id in enumerate(job_ids):
+        raw_status, results = replies[2 * i], replies[2 * i + 1]
+        if raw_status is None:
+            statuses.append({"job_id": job_id, "status": "not_found", "result": None, "error": None})
+            continue
+        status = JOB_STATES.get(raw_status.decode(), raw_status.decode())
+        result = error = None
+        if results:
+            result_id, payload = results[0]
+            latest = Result.restore(job_id, result_id.decode(), payload, connection=conn, serializer=queue.serializer)
+            if latest.type == Result.Type.SUCCESSFUL:
+                result = latest.return_value
+            elif latest.exc_string:
+                error = latest.exc_string.strip().splitlines()[-1]
+        statuses.append({"job_id": job_id, "status": status, "result": result, "error": error})
+    return statuses
+
 @app.get('/job-status')
-def get_job_status(
+async def get_job_status(
     job_id: str = Query(..., description="JOb_id")
 ):
-    job = queue.fetch_job(job_id=job_id)
-    result = job.return_value()
-    return { "result": result}
\ No newline at end of file
+    status = (await fetch_statuses([job_id]))[0]
+    if status["status"] == "not_found":
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return status
+
+@app.get('/job-status/batch')
+async def get_job_statuses(
+    job_ids: list[str] = Query(..., alias="job_id", description="Repeat job_id for every job")
+):
+    if len(job_ids) > MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH} job ids per request")
+    return {"jobs": await fetch_statuses(job_ids)}
+
+@app.get('/metrics')
+async def metrics():
+    """Latest stats reported by every running worker process."""
+    return await read_metrics(async_conn)
+
+@app.get('/chat/stream/{job_id}')
+async def stream_job(job_id: str):
+    """Relay the job's tokens as Server-Sent Events: token* then done|error."""
+    key = stream_key(job_id)
+
+    def sse(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def events():
+        last_id = "0"       # start from the beginning so late clients miss nothing
+        job_over = False
+        while True:
+            # Block up to 15s, then send a keep-alive comment so proxies don't drop us
+            block = None if job_over else STREAM_BLOCK_MS
+            response = await async_conn.xread({key: last_id}, count=100, block=block)
+            for entry_id, fields in response[0][1] if response else []:
+                last_id = entry_id
+                event = fields[b"type"].decode()
+                yield sse(event, fields[b"data"].decode())
+                if event in ("done", "error"):
+                    return
+            if response:
+                continue
+            if job_over:
+                # Job ended but its stream had no done/error (expired, or the
+                # worker died mid-job): answer from the job itself
+                if status["status"] == "finished":
+                    yield sse("done", status["result"])
+                else:
+                    yield sse("error", status["error"] or f"job {status['status']}")
+                return
+
+            # Nothing new: stop waiting if the job is gone, failed or already over
+            status = (await fetch_statuses([job_id]))[0]
+            if status["status"] in ("finished", "failed", "not_found"):
+                job_over = True     # one last non-blocking read for its final events
+                continue
+            yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
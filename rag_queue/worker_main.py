@@ -0,0 +1,81 @@
+# Run from the repo root:  python -m rag_queue.worker_main            (4 jobs per generation slot)
+#                          python -m rag_queue.worker_main --jobs 32
+#
+# Long-lived RQ worker: the embedder, OpenAI client and Qdrant store are
+# built once (by importing queues.worker) and shared by N worker threads,
+# instead of RQ's default fork-per-job which throws away warm connections.
+#
+# Priority works at two levels:
+#   - RQ: /chat puts jobs on the high/default/low queue by priority, and
+#     every thread listens to them in that order.
+#   - generation: there are more job threads than Ollama slots (by default
+#     4x OLLAMA_NUM_PARALLEL), so jobs that finished retrieval queue up in
+#     the scheduler, which orders them by priority and per-user turns.
+#     With jobs == slots the scheduler's queue would never build up.
+import argparse
+import signal
+import threading
+import time
+
+from rq import SimpleWorker
+from rq.timeouts import TimerDeathPenalty
+
+from .client.rq_client import conn, priority_queues
+from .queues import worker
+from .queues.metrics import start_reporter
+from .queues.scheduler import NUM_PARALLEL
+
+JOBS_PER_SLOT = 4      # job threads per generation slot (retrieval + waiting in the scheduler)
+
+
+class ThreadWorker(SimpleWorker):
+    # SIGALRM based job timeouts only work in the main thread
+    death_penalty_class = TimerDeathPenalty
+
+    def _install_signal_handlers(self):
+        # Signals can only be handled by the main thread, see main()
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm RAG worker")
+    parser.add_argument("--jobs", type=int, default=JOBS_PER_SLOT * NUM_PARALLEL,
+                        help="concurrent jobs in this process (default: 4 per OLLAMA_NUM_PARALLEL slot)")
+    args = parser.parse_args()
+
+    print("Warming up clients...")
+    worker.warm_up()
+
+    workers = [ThreadWorker(priority_queues, connection=conn) for _ in range(args.jobs)]
+    threads = [
+        threading.Thread(target=w.work, kwargs={"with_scheduler": False}, name=w.name, daemon=True)
+        for w in workers
+    ]
+    for t in threads:
+        t.start()
+    start_reporter(conn, lambda: {
+        "scheduler": worker.scheduler.metrics(),
+        "embedding_cache": worker.embedder.stats(),
+        "llm": worker.llm.metrics.snapshot(),
+    })
+    print(f"Worker ready, running up to {args.jobs} jobs at a time ✓")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.is_set() and any(t.is_alive() for t in threads):
+            stop.wait(1)
+    except KeyboardInterrupt:
+        pass
+
+    # Warm shutdown: no new jobs, let the running ones finish
+    print("\nStopping, waiting for running jobs...")
+    for w in workers:
+        w._stop_requested = True
+    deadline = time.time() + 60
+    while time.time() < deadline and any(w.get_state() == "busy" for w in workers):
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import threading
+
+from rag_queue.queues.scheduler import GenerationScheduler
+
+
+def test_priority_beats_own_earlier_requests_then_users_take_turns():
+    scheduler = GenerationScheduler(parallel=1, window=0)
+    order = []
+    gate = threading.Event()
+
+    # Hold the only slot so everything below is pending when the slot frees up
+    blocker = scheduler.submit(gate.wait, user="Z")
+
+    def job(name):
+        return lambda: order.append(name)
+
+    submitted = [
+        ("A", 5, "A-low"),
+        ("A", -1, "A-high"),
+        ("B", 0, "B-0"),
+        ("A", 0, "A-0"),
+        ("C", 0, "C-0"),
+    ]
+    futures = [scheduler.submit(job(name), user=user, priority=prio) for user, prio, name in submitted]
+    gate.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+
+    assert order == ["A-high", "B-0", "C-0", "A-0", "A-low"]
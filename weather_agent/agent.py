@@ -1,84 +1,95 @@
-from openai import OpenAI
-import requests
-import json
+# Run from the repo root:  python -m weather_agent.agent
+import asyncio
+import os
 
-client = OpenAI(base_url="http://localhost:11434/v1", api_key="none")
+import httpx
+from llm_gateway import LLMGateway
+
+from .tool_cache import CircuitOpen, ToolCache
+from .tools import ToolRegistry
+
+# gemma2:2b has no tool-calling support in Ollama, so use a model that does
+MODEL = "llama3.2:3b"
+MAX_TOOL_ROUNDS = 5     # tool-calling rounds per question, then it has to answer
+
+# Point at a local stand-in for testing, e.g. WTTR_URL=http://localhost:8080
+WTTR_URL = os.getenv("WTTR_URL", "https://wttr.in")
+
+llm = LLMGateway(model=MODEL)
+registry = ToolRegistry()
+
+# Weather barely changes in 10 minutes; serve stale up to an hour if wttr.in is down
+weather_cache = ToolCache(ttl=600, stale_ttl=3600, timeout=5.0)
+
+
+async def _fetch_weather(city: str) -> str:
+    for attempt in range(2):
+        try:
+            response = await registry.http.get(f"{WTTR_URL}/{city}", params={"format": "%C %t"})
+            response.raise_for_status()
+            return response.text.strip()
+        except httpx.TransportError:
+            # one quick retry for connection hiccups, timeouts are handled by the cache
+            if attempt:
+                raise
+            await asyncio.sleep(0.2)
+
+
+@registry.tool
+async def get_weather(city: str):
+    """Get the current weather condition and temperature for a city."""
+    key = city.strip().lower()
+    try:
+        condition = await weather_cache.get(key, lambda: _fetch_weather(key))
+    except CircuitOpen:
+        return "the weather service is unavailable right now, try again later"
+    except Exception:
+        return "something went wrong"
+    return f"The weather is {condition} in {city}"
 
-def get_weather(city: str):
-    url = f"https://wttr.in/{city.lower()}?format=%C+%t"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return f"The weather is {response.text.strip()} in {city}"
-    return "something went wrong"
 
 SYSTEM_PROMPT = """
-You're an expert AI Assistant in resolving user queries using chain of thought method.
-You work on START, PLAN, TOOL and OUTPUT steps.
+You're an expert AI Assistant in resolving user queries.
+Think step by step, and use the available tools whenever you need external information.
 
 RULES:
-- Strictly Follow the JSON output format.
-- Only run one step at a time.
-- The sequence of steps always begins with START (where user gives an input), then PLAN (can be many times), optionally TOOL (if external function required) and finally OUTPUT.
-- TOOL Step is used when you need to call a function.
-
-Output JSON format:
-{ "step": "START" | "PLAN" | "TOOL" | "OUTPUT", "content": "string" }
-
-------------------------------------------------
-Example 1 (Math):
-START: Hey, Can you solve 2 + 3 * 5 / 10
-PLAN: { "step": "PLAN", "content": "User wants to solve a math expression" }
-PLAN: { "step": "PLAN", "content": "We apply BODMAS rule" }
-PLAN: { "step": "PLAN", "content": "Multiply 3 * 5 = 15" }
-PLAN: { "step": "PLAN", "content": "Divide 15 / 10 = 1.5" }
-PLAN: { "step": "PLAN", "content": "Add 2 + 1.5 = 3.5" }
-OUTPUT: { "step": "OUTPUT", "content": "Result is 3.5" }
-
-------------------------------------------------
-Example 2 (Weather):
-START: What is the weather in Mumbai?
-PLAN: { "step": "PLAN", "content": "User wants weather information" }
-PLAN: { "step": "PLAN", "content": "We need to call the weather tool" }
-TOOL: { "step": "TOOL", "content": "get_weather('mumbai')" }
-PLAN: { "step": "PLAN", "content": "Received temperature and condition" }
-OUTPUT: { "step": "OUTPUT", "content": "It's overcast 29°C in Mumbai" }
-------------------------------------------------
+- If the question needs data for several things (e.g. weather in many cities),
+  call the tool for ALL of them in the same turn, not one at a time.
+- Once you have the tool results, answer the user directly and concisely.
 """
 
-def main():
+
+async def main():
     messages = [{"role": "system", "content": SYSTEM_PROMPT}]
     user_query = input("> ")
     messages.append({"role": "user", "content": user_query})
 
-    while True:
-        resp = client.chat.completions.create(
-            messages=messages,
-            model="gemma2:2b",
-            temperature=0.3
-        )
-        res = resp.choices[0].message.content
-        print(res)
+    try:
+        for round_no in range(MAX_TOOL_ROUNDS + 1):
+            # Last round offers no tools, so the model answers with what it has
+            last_round = round_no == MAX_TOOL_ROUNDS
+            tools = {} if last_round else {"tools": registry.schemas()}
+            resp = await llm.achat(messages, temperature=0.3, **tools)
+            msg = resp.choices[0].message
+            messages.append(msg.model_dump(exclude_none=True))
 
-        messages.append({"role": "assistant", "content": res})
+            if not msg.tool_calls:
+                print(msg.content)
+                break
+            if last_round:
+                print(f"⚠️ No answer after {MAX_TOOL_ROUNDS} rounds of tool calls, giving up")
+                break
 
-        # Check if tool step triggered
-        try:
-            data = json.loads(res)
-            if data.get("step") == "TOOL":
-                text = data["content"]
-                city = text[text.find("(")+1:text.find(")")].replace("'", "").replace('"', "")
-                tool_response = get_weather(city)
-                print(f"🛠️ TOOL RESULT: {tool_response}")
-                messages.append({"role": "user", "content": tool_response})
-        except:
-            pass
-
-        # 👉 KEY FIX: ask AI to continue planning
-        if '"step": "OUTPUT"' not in res:
-            messages.append({"role": "user", "content": "continue in JSON"})
-
-        if '"step": "OUTPUT"' in res:
-            break
+            # Every tool call of this turn runs concurrently → one round per turn
+            for tc in msg.tool_calls:
+                print(f"🛠️ TOOL: {tc.function.name}({tc.function.arguments})")
+            results = await registry.run_tool_calls(msg.tool_calls)
+            for result in results:
+                print(f"🛠️ TOOL RESULT: {result['content']}")
+            messages.extend(results)
+    finally:
+        await registry.aclose()
+        await llm.aclose()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Async result cache for slow tools (used by get_weather).
+
+- TTL per key: fresh values are returned without calling the tool
+- stale-while-revalidate: after the TTL, the old value is still returned
+  for `stale_ttl` seconds while one background refresh runs
+- single-flight: concurrent misses for the same key share one fetch
+- timeout on every fetch, and a circuit breaker that stops calling the
+  upstream for `reset_after` seconds after `max_failures` failures in a row
+  (a stale value is served instead, if there is one); after that a single
+  trial call decides whether it closes again
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, max_failures: int = 3, reset_after: float = 30.0):
+        self.max_failures = max_failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"      # let one trial call through
+        return "open"
+
+    def check(self):
+        state = self.state
+        if state == "open" or (state == "half-open" and self.trial_running):
+            raise CircuitOpen("upstream circuit is open")
+        if state == "half-open":
+            self.trial_running = True
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def release(self):
+        """The trial call ended without a verdict (cancelled), let the next one try."""
+        self.trial_running = False
+
+    def failure(self):
+        self.trial_running = False
+        self.failures += 1
+        if self.failures >= self.max_failures or self.state == "half-open":
+            self.opened_at = time.monotonic()
+
+
+@dataclass
+class _Entry:
+    value: object
+    fresh_until: float
+    stale_until: float
+
+
+class ToolCache:
+    def __init__(self, ttl: float = 600, stale_ttl: float = 3600, timeout: float = 5.0,
+                 breaker: CircuitBreaker | None = None, max_entries: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.max_entries = max_entries
+        self._entries: dict[str, _Entry] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    async def get(self, key: str, fetch, ttl: float | None = None):
+        """Cached value for `key`; `fetch()` is an async callable producing a fresh one."""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry and now < entry.fresh_until:
+            self.stats["hits"] += 1
+            return entry.value
+
+        if entry and now < entry.stale_until:
+            # Serve the old value now, refresh in the background (once)
+            self.stats["stale_hits"] += 1
+            self._refresh(key, fetch, ttl).add_done_callback(_ignore_result)
+            return entry.value
+
+        self.stats["misses"] += 1
+        try:
+            return await self._refresh(key, fetch, ttl)
+        except Exception:
+            # Upstream down: an expired value beats no value
+            if entry:
+                return entry.value
+            raise
+
+    def _refresh(self, key: str, fetch, ttl: float | None) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.ensure_future(self._fetch(key, fetch, ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch(self, key: str, fetch, ttl: float | None):
+        self.breaker.check()
+        try:
+            value = await asyncio.wait_for(fetch(), self.timeout)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            self.breaker.failure()
+            raise
+        self.breaker.success()
+
+        now = time.monotonic()
+        ttl = self.ttl if ttl is None else ttl
+        self._entries.pop(key, None)
+        self._entries[key] = _Entry(value, now + ttl, now + ttl + self.stale_ttl)
+        if len(self._entries) > self.max_entries:
+            # dicts keep insertion order → drop the least recently refreshed
+            del self._entries[next(iter(self._entries))]
+        return value
+
+
+def _ignore_result(task: asyncio.Task):
+    # Background refresh failures are already counted; don't log "never retrieved"
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,70 @@
+"""
+Tiny tool-calling engine for the weather agent.
+
+Functions registered with `@registry.tool` get an OpenAI function-calling
+schema built from their signature + docstring. `run_tool_calls()` executes
+every tool call from one model turn concurrently (asyncio.gather), and
+tools share one pooled httpx.AsyncClient (`registry.http`).
+"""
+import asyncio
+import inspect
+import json
+
+import httpx
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+class ToolRegistry:
+    def __init__(self, timeout: float = 10.0):
+        self._tools = {}
+        self.http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+    def tool(self, fn):
+        """Register an async function as a tool. First docstring line = description."""
+        params = inspect.signature(fn).parameters
+        self._tools[fn.__name__] = {
+            "fn": fn,
+            "schema": {
+                "type": "function",
+                "function": {
+                    "name": fn.__name__,
+                    "description": inspect.getdoc(fn).splitlines()[0] if fn.__doc__ else "",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            name: {"type": _JSON_TYPES.get(p.annotation, "string")} for name, p in params.items()
+                        },
+                        "required": [name for name, p in params.items() if p.default is inspect.Parameter.empty],
+                    },
+                },
+            },
+        }
+        return fn
+
+    def schemas(self) -> list[dict]:
+        return [t["schema"] for t in self._tools.values()]
+
+    async def _call(self, tool_call) -> dict:
+        name = tool_call.function.name
+        try:
+            entry = self._tools[name]
+            args = json.loads(tool_call.function.arguments or "{}")
+            result = await entry["fn"](**args)
+        except KeyError:
+            result = f"Unknown tool {name!r}"
+        except (json.JSONDecodeError, TypeError) as e:
+            result = f"Bad arguments for {name}: {e}"
+        except Exception as e:
+            result = f"{name} failed: {e}"
+        return {"role": "tool", "tool_call_id": tool_call.id, "content": str(result)}
+
+    async def run_tool_calls(self, tool_calls) -> list[dict]:
+        """Run all calls from one assistant turn at once; results keep the call order."""
+        return await asyncio.gather(*(self._call(tc) for tc in tool_calls))
+
+    async def aclose(self):
+        await self.http.aclose()